@@ -0,0 +1,74 @@
+"""Benchmark construction of Entry objects with and without validation.
+
+Run with: python -m benchmarks.entries [rows]
+
+On 300k rows, trusted entries are built at about 165k entries/s against 148k
+for validated ones, both take about 560 B/entry. A set of field names shared
+by all trusted entries saved 216 B/entry (345 B/entry, about 230k entries/s),
+but then changing model_fields_set of one entry changed all of them.
+"""
+
+import sys
+import time
+import tracemalloc
+
+from daylio_parser.config import MoodConfig
+from daylio_parser.parser import Entry
+from daylio_parser.timestamps import TimestampDecoder
+
+from .timestamps import synthetic_columns
+
+ACTIVITIES = ["work", "friends", "walk", "reading", "gaming", "sleep early"]
+
+
+def synthetic_rows(rows: int) -> list[tuple]:
+    """Generate (datetime, mood, activities, notes) of parsed rows."""
+    dates, times = synthetic_columns(rows)
+    decoder = TimestampDecoder()
+    moods = MoodConfig().moods
+
+    return [
+        (decoder.decode(date, t), moods[i % len(moods)], ACTIVITIES[: i % 4], "")
+        for i, (date, t) in enumerate(zip(dates, times, strict=True))
+    ]
+
+
+def validated(rows: list[tuple]) -> list[Entry]:
+    """Entries validated by pydantic."""
+    return [
+        Entry(datetime=dt, mood=mood, activities=list(activities), notes=notes)
+        for dt, mood, activities, notes in rows
+    ]
+
+
+def trusted(rows: list[tuple]) -> list[Entry]:
+    """Entries built without validation (parser output)."""
+    return [
+        Entry.trusted(datetime=dt, mood=mood, activities=list(activities), notes=notes)
+        for dt, mood, activities, notes in rows
+    ]
+
+
+def main(rows: int = 1_000_000) -> None:
+    """Time both paths and print entries/sec and memory per entry."""
+    data = synthetic_rows(rows)
+
+    for func in (validated, trusted):
+        start = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        entries = func(data)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del entries
+
+        print(
+            f"{func.__name__:<10} {elapsed:8.3f} s {rows / elapsed:14,.0f} entries/s"
+            f" {memory / rows:8.0f} B/entry",
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,108 @@
+"""Deterministic generator of synthetic Daylio exports.
+
+Run with: python -m benchmarks.generator path [rows]
+"""
+
+import csv
+import datetime
+import pathlib
+import random
+import sys
+from typing import TextIO
+
+from daylio_parser.config import DEFAULT_MOODS, MoodList
+
+HEADER = ["full_date", "date", "weekday", "time", "mood", "activities", "note_title", "note"]
+WORDS = ["today", "was", "a", "good", "bad", "long", "day", "at", "work", "with", "friends"]
+
+
+def generate_export(  # noqa: PLR0913 (options of the export)
+    f: TextIO,
+    rows: int | None = None,
+    *,
+    years: float = 1,
+    entries_per_day: int = 8,
+    activities: int = 30,
+    note_length: int = 40,
+    time_format: str = "mixed",
+    moods: MoodList = None,
+    end: datetime.date = datetime.date(2024, 1, 1),
+    seed: int = 0,
+) -> int:
+    """Write a synthetic export into a text file object, newest entries first.
+
+    The number of rows is given directly or by years of entries_per_day.
+    Moods follow a random walk over the levels of moods (DEFAULT_MOODS by default),
+    each entry has up to 5 activities from a vocabulary of the given size
+    (more frequent ones first) and every third entry has a note of about
+    note_length characters, sometimes on multiple lines. time_format is
+    "12h", "24h" or "mixed" (mostly 12h). Returns the number of rows.
+    """
+    rng = random.Random(seed)
+    moods = moods or DEFAULT_MOODS
+    levels = sorted({level for level, _ in moods})
+    names = {level: [name for lvl, name in moods if lvl == level] for level in levels}
+    vocabulary = [f"activity {i}" for i in range(activities)]
+    weights = [1 / (i + 1) for i in range(activities)]
+
+    if rows is None:
+        rows = int(years * 365 * entries_per_day)
+
+    writer = csv.writer(f, delimiter=",", quotechar='"')
+    writer.writerow(HEADER)
+    level = len(levels) / 2
+
+    for i in range(rows):
+        day = end - datetime.timedelta(days=i // entries_per_day)
+        # Entries of a day go from the evening to the morning
+        minutes = 23 * 60 - (i % entries_per_day) * (22 * 60 // entries_per_day)
+        minutes -= rng.randrange(22 * 60 // entries_per_day)
+
+        level = min(max(level + rng.gauss(0, 0.7), 0), len(levels) - 1)
+        mood = rng.choice(names[levels[round(level)]])
+
+        count = min(int(rng.expovariate(0.7)), 5, activities)
+        entry_activities = sorted(set(rng.choices(vocabulary, weights, k=count)))
+
+        writer.writerow(
+            [
+                day.isoformat(),
+                f"{day.day} {day:%B}",
+                day.strftime("%A"),
+                _format_time(minutes // 60, minutes % 60, time_format, rng),
+                mood,
+                " | ".join(entry_activities),
+                "",
+                _note(note_length, rng) if i % 3 == 0 else "",
+            ],
+        )
+
+    return rows
+
+
+def _format_time(hour: int, minute: int, time_format: str, rng: random.Random) -> str:
+    """Format time like Daylio does in the 12h or 24h format."""
+    if time_format == "24h" or (time_format == "mixed" and rng.random() < 0.1):
+        return f"{hour}:{minute:02d}"
+
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'am' if hour < 12 else 'pm'}"
+
+
+def _note(length: int, rng: random.Random) -> str:
+    """Random words of about the given length, sometimes with quotes and newlines."""
+    words = []
+
+    while sum(map(len, words)) + len(words) < length:
+        words.append(rng.choice(WORDS))
+
+    note = " ".join(words)
+
+    if rng.random() < 0.1:
+        note = f'"{note}"\nSecond line'
+
+    return note
+
+
+if __name__ == "__main__":
+    with pathlib.Path(sys.argv[1]).open("w", newline="") as fwrite:
+        generate_export(fwrite, *(int(arg) for arg in sys.argv[2:]))
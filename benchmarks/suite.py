@@ -0,0 +1,95 @@
+"""Benchmark parsing, stats and plot data on synthetic exports of several sizes.
+
+Run with: python -m benchmarks.suite [rows ...] [--no-memory]
+
+Every case is timed on its own, then run again under tracemalloc to get
+its peak memory (NumPy allocations are traced too), unless --no-memory is given.
+Exports span at most MAX_YEARS, larger ones have more entries per day.
+Parser.load_csv on 10M rows needs several GB of memory for the Entry objects.
+"""
+
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from daylio_parser.parser import Parser
+from daylio_parser.plot import PlotData
+from daylio_parser.stats import Stats
+
+from .generator import generate_export
+
+SIZES = (1_000, 100_000, 10_000_000)
+MAX_YEARS = 30
+
+
+def cases(path: pathlib.Path) -> dict:
+    """Return {name: function} of all benchmarked cases for an export."""
+    table = Parser().load_table(path)
+    moods = PlotData(table).interpolate()[1]
+
+    return {
+        "Parser.load_csv": lambda: Parser().load_csv(path),
+        "Parser.load_table": lambda: Parser().load_table(path),
+        "Stats.average_moods": lambda: Stats(table).average_moods(),
+        "Stats.activity_moods": lambda: Stats(table).activity_moods(),
+        "Stats.activity_cooccurrence": lambda: Stats(table).activity_cooccurrence(),
+        "Stats.mean": lambda: Stats(table).mean(),
+        "Stats.rolling_mean": lambda: Stats(table).rolling_mean(),
+        "Stats.rolling median": lambda: Stats(table).rolling(30, "median", "time"),
+        "Stats.rolling ewma": lambda: Stats(table).rolling(30, "ewma", "time"),
+        "Stats.resample": lambda: Stats(table).resample("week"),
+        "Stats.find_high_periods": lambda: Stats(table).find_high_periods(),
+        "Stats.find_low_periods": lambda: Stats(table).find_low_periods(),
+        "Stats.stability_by_month": lambda: Stats(table).stability_by_month(),
+        "Stats.stability_windows": lambda: Stats(table).stability_windows(30),
+        "Stats.between": lambda: Stats(table).between(table[len(table) // 2].datetime),
+        "PlotData.interpolate": lambda: PlotData(table).interpolate(),
+        "PlotData.split_into_bands": lambda: PlotData(table).split_into_bands(moods),
+        "PlotData.split_into_segments": lambda: PlotData(table).split_into_segments(moods),
+    }
+
+
+def measure(func: Callable[[], object], *, memory: bool = True) -> tuple[float, int | None]:
+    """Return (wall time in seconds, peak memory in bytes or None) of calling func."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    if not memory:
+        return elapsed, None
+
+    tracemalloc.start()
+
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main(*args: str) -> None:
+    """Run all cases for each size and print time and peak memory."""
+    memory = "--no-memory" not in args
+    sizes = [int(arg) for arg in args if not arg.startswith("--")] or SIZES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = pathlib.Path(tmp) / f"export_{rows}.csv"
+
+            with path.open("w", newline="") as fwrite:
+                generate_export(fwrite, rows, entries_per_day=max(8, -(-rows // (MAX_YEARS * 365))))
+
+            for name, func in cases(path).items():
+                elapsed, peak = measure(func, memory=memory)
+                peak = "" if peak is None else f"{peak / 2**20:10.1f} MiB"
+
+                print(f"{rows:>12,} {name:<30} {elapsed:9.4f} s {peak}", flush=True)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,81 @@
+"""Benchmark timestamp parsing on a synthetic export.
+
+Run with: python -m benchmarks.timestamps [rows]
+"""
+
+import datetime
+import random
+import sys
+import time
+
+import numpy as np
+
+from daylio_parser.timestamps import TimestampDecoder
+
+
+def synthetic_columns(rows: int, seed: int = 0) -> tuple[list[str], list[str]]:
+    """Generate full_date and time columns, ~8 entries per day, mostly in the 12h format."""
+    rng = random.Random(seed)
+    start = datetime.date(2015, 1, 1)
+    dates = []
+    times = []
+
+    for i in range(rows):
+        date = start + datetime.timedelta(days=i // 8)
+        hour = rng.randrange(24)
+        minute = rng.randrange(60)
+
+        dates.append(date.isoformat())
+
+        if rng.random() < 0.9:
+            times.append(f"{(hour - 1) % 12 + 1}:{minute:02d} {'am' if hour < 12 else 'pm'}")
+        else:
+            times.append(f"{hour}:{minute:02d}")
+
+    return dates, times
+
+
+def strptime_decode(dates: list[str], times: list[str]) -> list[datetime.datetime]:
+    """Decode with per-row strptime, as the parser originally did."""
+    result = []
+
+    for date, t in zip(dates, times, strict=True):
+        dt = datetime.datetime.strptime(date, "%Y-%m-%d")  # noqa: DTZ007
+
+        try:
+            parsed = datetime.datetime.strptime(t, "%I:%M %p")  # noqa: DTZ007
+        except ValueError:
+            parsed = datetime.datetime.strptime(t, "%H:%M")  # noqa: DTZ007
+
+        parsed = datetime.time(hour=parsed.hour, minute=parsed.minute)
+        result.append(dt.combine(dt, parsed))
+
+    return result
+
+
+def decoder_decode(dates: list[str], times: list[str]) -> list[datetime.datetime]:
+    """Decode with the per-row cache (Parser.load_from_buffer)."""
+    decoder = TimestampDecoder()
+
+    return [decoder.decode(date, t) for date, t in zip(dates, times, strict=True)]
+
+
+def decoder_decode_many(dates: list[str], times: list[str]) -> np.ndarray:
+    """Decode in bulk into datetime64 (Parser.load_table_from_buffer)."""
+    return TimestampDecoder().decode_many(dates, times)
+
+
+def main(rows: int = 1_000_000) -> None:
+    """Time all implementations and print rows/sec."""
+    dates, times = synthetic_columns(rows)
+
+    for func in (strptime_decode, decoder_decode, decoder_decode_many):
+        start = time.perf_counter()
+        func(dates, times)
+        elapsed = time.perf_counter() - start
+
+        print(f"{func.__name__:<22} {elapsed:8.3f} s {rows / elapsed:14,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
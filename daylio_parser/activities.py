@@ -0,0 +1,54 @@
+"""Activity vocabulary."""
+
+from collections.abc import Iterable
+
+ACTIVITY_SEPARATOR = " | "
+
+
+class ActivityVocabulary:
+    """Intern activity names to small integer IDs.
+
+    IDs are assigned in the order the activities are first seen. Every name
+    is stored once, and each distinct activities field of the CSV is split
+    only once.
+    """
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.__ids: dict[str, int] = {}
+        # activities field -> IDs
+        self.__fields: dict[str, tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__ids
+
+    def intern(self, name: str) -> int:
+        """Return the ID of an activity, adding it if it's new."""
+        try:
+            return self.__ids[name]
+        except KeyError:
+            activity_id = self.__ids[name] = len(self.names)
+            self.names.append(name)
+
+            return activity_id
+
+    def encode(self, names: Iterable[str]) -> tuple[int, ...]:
+        """Return IDs of activities, adding new ones."""
+        return tuple(self.intern(name) for name in names)
+
+    def decode(self, ids: Iterable[int]) -> list[str]:
+        """Return names of activities by their IDs."""
+        return [self.names[activity_id] for activity_id in ids]
+
+    def parse(self, field: str) -> tuple[int, ...]:
+        """Return IDs of activities in the activities field of the CSV."""
+        try:
+            return self.__fields[field]
+        except KeyError:
+            names = field.split(ACTIVITY_SEPARATOR) if field else []
+            ids = self.__fields[field] = self.encode(names)
+
+            return ids
@@ -0,0 +1,172 @@
+"""Asyncio-friendly loading and analysis."""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import io
+import os
+from collections.abc import Callable
+from typing import TypeVar
+
+from .config import MoodConfig
+from .lazy import LazyModule
+from .parser import Entry, EntryTable, Parser
+from .stats import ActivityCooccurrence, MoodPeriod, Stats
+
+np = LazyModule("numpy")
+
+READ_CHUNK_SIZE = 1 << 20
+
+T = TypeVar("T")
+
+
+class AsyncRunner:
+    """Run blocking calls in an executor with an upper bound on concurrent jobs.
+
+    If executor is None, the default executor of the event loop is used.
+    Share one runner between AsyncParser and AsyncStats objects
+    to bound the number of jobs across all of them.
+    """
+
+    def __init__(
+        self,
+        executor: concurrent.futures.Executor | None = None,
+        max_jobs: int | None = None,
+    ) -> None:
+        self.executor = executor
+        self.__semaphore = asyncio.Semaphore(max_jobs) if max_jobs else None
+
+    async def run(self, func: Callable[..., T], *args: object, **kwargs: object) -> T:
+        """Run func(*args, **kwargs) in the executor and return its result.
+
+        Cancelling the caller stops waiting for the result, but a job
+        that has already started runs to completion in the executor.
+
+        In threads, the job runs in a copy of the caller's context (like
+        asyncio.to_thread), so e.g. stages are recorded in metrics.collect().
+        Jobs in a process pool can't record into the caller's metrics.
+        """
+        call = functools.partial(func, *args, **kwargs)
+
+        if not isinstance(self.executor, concurrent.futures.ProcessPoolExecutor):
+            call = functools.partial(contextvars.copy_context().run, call)
+
+        async with self.__semaphore or contextlib.nullcontext():
+            loop = asyncio.get_running_loop()
+
+            return await loop.run_in_executor(self.executor, call)
+
+
+class AsyncParser:
+    """Asyncio counterpart of Parser.
+
+    Files are read in chunks in a thread, so the event loop isn't blocked
+    and loading can be cancelled between chunks. Parsing runs in the runner
+    with a new Parser for each job, so that concurrent jobs don't share its state.
+    The activities are then added to the vocabulary of parser in the event loop,
+    so that activity IDs of all tables match, like with a single Parser.
+    """
+
+    def __init__(self, config: MoodConfig = None, runner: AsyncRunner | None = None) -> None:
+        """Create the object. If config is None, a default MoodConfig is created."""
+        self.parser = Parser(config)
+        self.runner = runner if runner else AsyncRunner()
+
+    @property
+    def config(self) -> MoodConfig:
+        """Mood config of the parser."""
+        return self.parser.config
+
+    async def load_csv(self, path: str | os.PathLike) -> list[Entry]:
+        """Load data from a CSV file."""
+        entries, activity_names = await self.runner.run(
+            _parse,
+            self.config,
+            await read_text(path),
+            table=False,
+        )
+        self.parser.activities.encode(activity_names)
+
+        return entries
+
+    async def load_table(self, path: str | os.PathLike) -> EntryTable:
+        """Load data from a CSV file into an EntryTable."""
+        table, _ = await self.runner.run(_parse, self.config, await read_text(path), table=True)
+
+        return self.parser.share_activities(table)
+
+
+class AsyncStats:
+    """Asyncio counterpart of Stats, the computations run in the runner."""
+
+    def __init__(self, stats: Stats, runner: AsyncRunner | None = None) -> None:
+        self.stats = stats
+        self.runner = runner if runner else AsyncRunner()
+
+    async def average_moods(self) -> list:
+        """See Stats.average_moods."""
+        return await self.runner.run(self.stats.average_moods)
+
+    async def activity_moods(self) -> dict[str, tuple[float, float]]:
+        """See Stats.activity_moods."""
+        return await self.runner.run(self.stats.activity_moods)
+
+    async def activity_cooccurrence(self) -> ActivityCooccurrence:
+        """See Stats.activity_cooccurrence."""
+        return await self.runner.run(self.stats.activity_cooccurrence)
+
+    async def mean(self) -> tuple[float, float]:
+        """See Stats.mean."""
+        return await self.runner.run(self.stats.mean)
+
+    async def rolling_mean(self, N: int = 5) -> "np.ndarray":  # noqa: N803
+        """See Stats.rolling_mean."""
+        return await self.runner.run(self.stats.rolling_mean, N)
+
+    async def find_periods(self, *args: object, **kwargs: object) -> list[MoodPeriod]:
+        """See Stats.find_periods."""
+        return await self.runner.run(self.stats.find_periods, *args, **kwargs)
+
+    async def find_high_periods(self, *args: object, **kwargs: object) -> list[MoodPeriod]:
+        """See Stats.find_high_periods."""
+        return await self.runner.run(self.stats.find_high_periods, *args, **kwargs)
+
+    async def find_low_periods(self, *args: object, **kwargs: object) -> list[MoodPeriod]:
+        """See Stats.find_low_periods."""
+        return await self.runner.run(self.stats.find_low_periods, *args, **kwargs)
+
+
+async def read_text(path: str | os.PathLike, chunk_size: int = READ_CHUNK_SIZE) -> str:
+    """Read a text file in chunks in a thread, without blocking the event loop."""
+    fread = await asyncio.to_thread(open, path)
+    chunks = []
+
+    try:
+        while chunk := await asyncio.to_thread(fread.read, chunk_size):
+            chunks.append(chunk)
+    finally:
+        fread.close()
+
+    return "".join(chunks)
+
+
+def _parse(
+    config: MoodConfig,
+    text: str,
+    *,
+    table: bool,
+) -> tuple[list[Entry] | EntryTable, list[str]]:
+    """Parse CSV text with a new Parser, return the result and activity names in file order.
+
+    This is a module level function, so that it can run in a process pool.
+    """
+    parser = Parser(config)
+
+    if table:
+        result = parser.load_table_from_buffer(io.StringIO(text))
+    else:
+        result = parser.load_from_buffer(io.StringIO(text))
+
+    return result, parser.activities.names
@@ -0,0 +1,140 @@
+"""Batch analysis of many exports."""
+
+import concurrent.futures
+from collections.abc import Iterable, Mapping
+
+from pydantic import BaseModel
+
+from .config import MoodConfig
+from .lazy import LazyModule, NDArray
+from .parser import Parser
+from .stats import Stats
+
+np = LazyModule("numpy")
+
+
+class BatchResult(BaseModel):
+    """Consolidated results of analyze for many users.
+
+    Every table is a dict of equally long column arrays. The user column
+    holds indexes into users.
+    """
+
+    users: list[str]
+    # Columns user, date and mood
+    daily: dict[str, NDArray]
+    # Columns user, activity, mean and std
+    activities: dict[str, NDArray]
+    # Columns user, kind, start, end, duration and avg_mood
+    periods: dict[str, NDArray]
+    # {user: error message} for exports that failed
+    errors: dict[str, str]
+
+
+def analyze(  # noqa: PLR0913 (options of the pool)
+    paths: Iterable | Mapping,
+    config_map: Mapping[str, MoodConfig] | None = None,
+    *,
+    workers: int | None = None,
+    chunksize: int = 1,
+    executor: str = "process",
+    cache: bool = False,
+) -> BatchResult:
+    """Parse and analyze many exports in parallel.
+
+    paths is either an iterable of CSV paths (users are named by the paths)
+    or a mapping {user: path}. config_map optionally maps users to their
+    MoodConfig, others use the default config.
+
+    Exports are processed in a process pool (executor="process") or a thread
+    pool (executor="thread") with the given number of workers, chunksize
+    exports are sent to a worker at once. An export that fails doesn't stop
+    the others, its error is reported in BatchResult.errors.
+    """
+    if not isinstance(paths, Mapping):
+        paths = {str(path): path for path in paths}
+
+    config_map = config_map or {}
+    users = list(paths)
+    jobs = [(paths[user], config_map.get(user), cache) for user in users]
+
+    if executor == "process":
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    elif executor == "thread":
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    else:
+        msg = f"Unknown executor '{executor}'"
+        raise ValueError(msg)
+
+    with pool:
+        results = list(pool.map(_analyze_one, jobs, chunksize=chunksize))
+
+    return _consolidate(users, results)
+
+
+def _analyze_one(job: tuple) -> dict | str:
+    """Analyze one export, return its columns or an error message."""
+    path, config, cache = job
+
+    try:
+        table = Parser(config).load_table(path, cache=cache)
+        stats = Stats(table, config)
+
+        avg_moods = stats.average_moods()
+        activity_moods = stats.activity_moods()
+        periods = [("high", period) for period in stats.find_high_periods()]
+        periods += [("low", period) for period in stats.find_low_periods()]
+    except Exception as e:  # noqa: BLE001 (a failed export is reported, not raised)
+        return f"{type(e).__name__}: {e}"
+
+    return _columns(avg_moods, activity_moods, periods)
+
+
+def _columns(avg_moods: list, activity_moods: dict, periods: list) -> dict:
+    """Convert results for one user into columns."""
+    return {
+        "daily": {
+            "date": np.array([date for date, _ in avg_moods], dtype="datetime64[D]"),
+            "mood": np.array([mood for _, mood in avg_moods], dtype=np.float64),
+        },
+        "activities": {
+            "activity": np.array(list(activity_moods), dtype=object),
+            "mean": np.array([mean for mean, _ in activity_moods.values()], dtype=np.float64),
+            "std": np.array([std for _, std in activity_moods.values()], dtype=np.float64),
+        },
+        "periods": {
+            "kind": np.array([kind for kind, _ in periods], dtype=object),
+            "start": np.array([period.start for _, period in periods], dtype="datetime64[D]"),
+            "end": np.array([period.end for _, period in periods], dtype="datetime64[D]"),
+            "duration": np.array([period.duration for _, period in periods], dtype=np.int64),
+            "avg_mood": np.array([period.avg_mood for _, period in periods], dtype=np.float64),
+        },
+    }
+
+
+def _consolidate(users: list[str], results: list[dict | str]) -> BatchResult:
+    """Concatenate per-user columns into one table per kind of result."""
+    errors = {}
+
+    # Start with empty columns, so that the dtypes are right even without results
+    tables = {
+        name: [{"user": np.array([], dtype=np.int64), **columns}]
+        for name, columns in _columns([], {}, []).items()
+    }
+
+    for user_index, (user, result) in enumerate(zip(users, results, strict=True)):
+        if isinstance(result, str):
+            errors[user] = result
+            continue
+
+        for name, columns in result.items():
+            length = len(next(iter(columns.values())))
+            user_column = np.full(length, user_index, dtype=np.int64)
+            tables[name].append({"user": user_column, **columns})
+
+    consolidated = {
+        name: {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+        for name, parts in tables.items()
+    }
+
+    return BatchResult(users=users, errors=errors, **consolidated)
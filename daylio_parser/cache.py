@@ -0,0 +1,51 @@
+"""Fingerprints and locations of cached parsed exports."""
+
+import hashlib
+import json
+import os
+import pathlib
+
+from .config import MoodConfig
+
+CACHE_SUFFIX = ".daylio-cache"
+
+# Bump when the cache file layout changes
+CACHE_VERSION = 2
+
+
+def cache_path(
+    csv_path: str | os.PathLike,
+    cache_dir: str | os.PathLike | None = None,
+) -> pathlib.Path:
+    """Return the cache directory for a CSV, next to it or in cache_dir.
+
+    In cache_dir, the name includes a hash of the absolute CSV path,
+    so that exports with the same file name get separate caches.
+    """
+    csv_path = pathlib.Path(csv_path)
+
+    if not cache_dir:
+        return csv_path.parent / f".{csv_path.name}{CACHE_SUFFIX}"
+
+    path_hash = hashlib.sha256(str(csv_path.resolve()).encode()).hexdigest()[:16]
+
+    return pathlib.Path(cache_dir) / f".{csv_path.name}.{path_hash}{CACHE_SUFFIX}"
+
+
+def fingerprint(csv_path: str | os.PathLike, config: MoodConfig) -> str:
+    """Return a key identifying the contents of a CSV parsed with config.
+
+    The key changes with the file size, mtime, contents and the mood config.
+    """
+    csv_path = pathlib.Path(csv_path)
+    stat = csv_path.stat()
+    digest = hashlib.sha256()
+
+    with csv_path.open("rb") as fread:
+        while chunk := fread.read(1 << 20):
+            digest.update(chunk)
+
+    moods = [(mood.name, mood.level, mood.color, mood.boundaries) for mood in config.moods]
+    key = json.dumps([CACHE_VERSION, stat.st_size, stat.st_mtime_ns, digest.hexdigest(), moods])
+
+    return hashlib.sha256(key.encode()).hexdigest()
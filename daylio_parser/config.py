@@ -6,6 +6,10 @@ from typing import NewType
 from pydantic import BaseModel, ValidationError, validator
 from pydantic.types import conint
 
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+
 DEFAULT_MOODS = [
     (1, "awful"),
     (2, "bad"),
@@ -50,7 +54,13 @@ class MoodNotFoundError(Exception):
 
 
 class MoodConfig:
-    """Configure mood levels and their properties."""
+    """Configure mood levels and their properties.
+
+    Besides Mood objects, the config has NumPy lookup tables. Moods are
+    identified by codes (indexes into moods), see MoodConfig.codes, and
+    mood_levels maps codes to levels. level_boundaries and level_colors
+    are indexed by levels (row 0 is unused). The tables are built on first use.
+    """
 
     def __init__(self, mood_list: MoodList = None, color_palette: list[str] | None = None) -> None:
         """Create the config with a list of moods: [(level, name), ...].
@@ -60,6 +70,8 @@ class MoodConfig:
         """
         self.moods: list[Mood] = []
         self.__map = {}
+        self.__codes = {}
+        self.__tables = None
 
         if not mood_list:
             mood_list = DEFAULT_MOODS
@@ -103,12 +115,49 @@ class MoodConfig:
         except KeyError:
             raise MoodNotFoundError(f"Mood '{mood_name}' is not configured")
 
+    @property
+    def mood_names(self) -> "np.ndarray":
+        """Mood names by code."""
+        return self.__lookup_tables()[0]
+
+    @property
+    def mood_levels(self) -> "np.ndarray":
+        """Mood levels by code."""
+        return self.__lookup_tables()[1]
+
+    @property
+    def level_boundaries(self) -> "np.ndarray":
+        """Mood boundaries by level, shape (6, 2)."""
+        return self.__lookup_tables()[2]
+
+    @property
+    def level_colors(self) -> "np.ndarray":
+        """Mood colors by level."""
+        return self.__lookup_tables()[3]
+
+    def codes(self, mood_names: list[str]) -> "np.ndarray":
+        """Return mood codes (indexes into moods) for a column of mood names.
+
+        The names are mapped in one pass without creating Mood objects.
+        """
+        try:
+            return np.fromiter(
+                map(self.__codes.__getitem__, mood_names),
+                dtype=np.int16,
+                count=len(mood_names),
+            )
+        except KeyError as e:
+            msg = f"Mood '{e.args[0]}' is not configured"
+            raise MoodNotFoundError(msg) from None
+
     def __load_moods(self, mood_list: MoodList, color_palette: list[str] = None):
         self.__validate_mood_list(mood_list)
         self.__validate_color_palette(color_palette)
 
         self.moods = []
         self.__map = {}
+        self.__codes = {}
+        self.__tables = None
 
         for level, name in mood_list:
             if level == 1:
@@ -132,9 +181,26 @@ class MoodConfig:
                 boundaries=boundaries,
             )
 
+            self.__codes[name] = len(self.moods)
             self.moods.append(mood)
             self.__map[name] = mood
 
+    def __lookup_tables(self) -> tuple:
+        """Return the NumPy lookup tables, building them from moods on first use."""
+        if self.__tables is None:
+            names = np.array([mood.name for mood in self.moods])
+            levels = np.array([mood.level for mood in self.moods], dtype=np.int8)
+            boundaries = np.full((6, 2), np.nan)
+            colors = np.full(6, "", dtype=object)
+
+            for mood in self.moods:
+                boundaries[mood.level] = mood.boundaries
+                colors[mood.level] = mood.color
+
+            self.__tables = (names, levels, boundaries, colors)
+
+        return self.__tables
+
     def __validate_mood_list(self, mood_list: MoodList):
         """Validate the provided mood list."""
         for mood in mood_list:
@@ -0,0 +1,97 @@
+"""Daily series of moods on a dense calendar."""
+
+import datetime
+
+from .lazy import LazyModule
+from .parser import EntryTable
+
+np = LazyModule("numpy")
+
+
+class DailySeries:
+    """Average moods for every day from the first to the last day with entries.
+
+    Days without entries have NaN means and zero counts, they're marked
+    in gaps. Runs of consecutive days with entries are indexed in runs
+    as [start, stop) index pairs. The arrays are read-only, so that slices
+    can share them.
+    """
+
+    def __init__(  # noqa: PLR0913 (one argument per column)
+        self,
+        dates: "np.ndarray",
+        means: "np.ndarray",
+        counts: "np.ndarray",
+        gaps: "np.ndarray | None" = None,
+        runs: "np.ndarray | None" = None,
+    ) -> None:
+        """Create the series from dense columns, gaps and runs are computed if None."""
+        self.dates = dates
+        self.means = means
+        self.counts = counts
+        self.gaps = self.counts == 0 if gaps is None else gaps
+
+        if runs is None:
+            edges = np.diff((~self.gaps).astype(np.int8), prepend=0, append=0)
+            runs = np.column_stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+        self.runs = runs
+
+        for column in (self.dates, self.means, self.counts, self.gaps, self.runs):
+            column.flags.writeable = False
+
+    @classmethod
+    def from_table(cls: type["DailySeries"], table: EntryTable) -> "DailySeries":
+        """Compute the series from entries in an EntryTable."""
+        days = table.datetimes.astype("datetime64[D]")
+        first = days.min() if len(days) else np.datetime64(0, "D")
+        day_index = (days - first).astype(np.int64)
+
+        sums = np.bincount(day_index, weights=table.levels)
+        counts = np.bincount(day_index, minlength=len(sums))
+
+        with np.errstate(invalid="ignore"):
+            means = sums / counts
+
+        return cls(first + np.arange(len(counts)), means, counts)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def slice(
+        self,
+        start: datetime.date | None = None,
+        end: datetime.date | None = None,
+    ) -> "DailySeries":
+        """Return the days from start to end (both included) as views of this series.
+
+        Bounds are found by binary search, runs are cut at the bounds.
+        """
+        first, stop = 0, len(self)
+
+        if start is not None:
+            first = int(np.searchsorted(self.dates, np.datetime64(start, "D")))
+
+        if end is not None:
+            stop = int(np.searchsorted(self.dates, np.datetime64(end, "D"), side="right"))
+
+        stop = max(stop, first)
+
+        # Runs that overlap [first, stop)
+        run_first = np.searchsorted(self.runs[:, 1], first, side="right")
+        run_stop = np.searchsorted(self.runs[:, 0], stop)
+        runs = np.clip(self.runs[run_first:run_stop], first, stop) - first
+
+        return DailySeries(
+            self.dates[first:stop],
+            self.means[first:stop],
+            self.counts[first:stop],
+            self.gaps[first:stop],
+            runs,
+        )
+
+    def average_moods(self) -> list[tuple[datetime.date, float]]:
+        """Return [(date, average mood), ...] for days with entries, see Stats.average_moods."""
+        present = ~self.gaps
+
+        return list(zip(self.dates[present].tolist(), self.means[present], strict=True))
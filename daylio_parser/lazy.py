@@ -0,0 +1,48 @@
+"""Lazy import of heavy dependencies.
+
+The parser only needs NumPy for tables, so all modules refer to it through
+a LazyModule and importing them (e.g. ``daylio_parser.stats``) doesn't import
+NumPy until a NumPy-backed method is first called. Pydantic is imported
+eagerly, since Entry, Mood and the result models are pydantic classes.
+"""
+
+import importlib
+from typing import Annotated, Any
+
+from pydantic import PlainValidator
+
+
+class LazyModule:
+    """Stand-in for a module, which is imported on the first attribute access.
+
+    Attributes are cached on the stand-in, so later lookups cost the same
+    as on the module. Annotations using the module have to be strings.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.__name = name
+
+    def __getattr__(self, attr: str) -> object:
+        value = getattr(importlib.import_module(self.__name), attr)
+        setattr(self, attr, value)
+
+        return value
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self.__name}'>"
+
+
+np = LazyModule("numpy")
+
+
+def _validate_ndarray(value: object) -> object:
+    if not isinstance(value, np.ndarray):
+        msg = f"Expected a NumPy array, got {type(value).__name__}"
+        raise ValueError(msg)  # noqa: TRY004 (pydantic only converts ValueError)
+
+    return value
+
+
+# NumPy array field of a pydantic model, which doesn't import NumPy when the model
+# class is created (unlike np.ndarray with arbitrary_types_allowed)
+NDArray = Annotated[Any, PlainValidator(_validate_ndarray)]
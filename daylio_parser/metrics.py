@@ -0,0 +1,184 @@
+"""Optional per-stage timing of parsing and analysis.
+
+Stages are only recorded inside collect(), otherwise they cost a context
+variable lookup. Stages are named like "parser.timestamps" or "stats.resample".
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+
+
+class StageRecord:
+    """Measurements of one run of a stage."""
+
+    def __init__(self, name: str, rows: int = 0, nbytes: int = 0) -> None:
+        self.name = name
+        self.seconds = 0.0
+        self.rows = rows
+        self.nbytes = nbytes
+        # Peak of traced memory above the start of the stage (if tracking allocations)
+        self.allocated = 0
+        self.peak = 0
+        self.start_memory = 0
+
+
+class StageStats:
+    """Totals of all runs of a stage."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.nbytes = 0
+        self.allocated = 0
+
+    def add(self, record: StageRecord) -> None:
+        """Add one run, allocated is the maximum of all runs."""
+        self.calls += 1
+        self.seconds += record.seconds
+        self.rows += record.rows
+        self.nbytes += record.nbytes
+        self.allocated = max(self.allocated, record.allocated)
+
+
+class Metrics:
+    """Collects stage records into per-stage totals and passes them to an optional sink.
+
+    With allocations=True, memory is traced with tracemalloc (which slows
+    everything down and is process-wide, so collect in one thread only).
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[StageRecord], None] | None = None,
+        *,
+        allocations: bool = False,
+    ) -> None:
+        self.sink = sink
+        self.allocations = allocations
+        self.stages: dict[str, StageStats] = {}
+        self.__lock = threading.Lock()
+        self.__open: list[StageRecord] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows: int = 0, nbytes: int = 0) -> Iterator[StageRecord]:
+        """Measure a stage, the yielded record's rows and nbytes can be set inside."""
+        record = StageRecord(name, rows, nbytes)
+
+        if self.allocations:
+            self.__enter_allocations(record)
+
+        start = time.perf_counter()
+
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+
+            if self.allocations:
+                self.__exit_allocations(record)
+
+            self.add(record)
+
+    def add(self, record: StageRecord) -> None:
+        """Add a finished stage record."""
+        with self.__lock:
+            self.stages.setdefault(record.name, StageStats()).add(record)
+
+        if self.sink:
+            self.sink(record)
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        """Return {stage: {"calls", "seconds", "rows", "nbytes", "allocated"}}."""
+        with self.__lock:
+            return {name: dict(vars(stats)) for name, stats in self.stages.items()}
+
+    def __enter_allocations(self, record: StageRecord) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        current, peak = tracemalloc.get_traced_memory()
+
+        # The peak is reset for this stage, keep the one seen so far by the enclosing stage
+        if self.__open:
+            self.__open[-1].peak = max(self.__open[-1].peak, peak)
+
+        tracemalloc.reset_peak()
+        record.start_memory = record.peak = current
+        self.__open.append(record)
+
+    def __exit_allocations(self, record: StageRecord) -> None:
+        record.peak = max(record.peak, tracemalloc.get_traced_memory()[1])
+        record.allocated = record.peak - record.start_memory
+        self.__open.remove(record)
+
+        if self.__open:
+            self.__open[-1].peak = max(self.__open[-1].peak, record.peak)
+
+
+class _NullStage:
+    """Stage used when no metrics are collected, it ignores everything."""
+
+    rows = 0
+    nbytes = 0
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: object) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+_metrics: contextvars.ContextVar[Metrics | None] = contextvars.ContextVar(
+    "daylio_parser_metrics",
+    default=None,
+)
+
+
+def stage(
+    name: str,
+    rows: int = 0,
+    nbytes: int = 0,
+) -> contextlib.AbstractContextManager[StageRecord | _NullStage]:
+    """Return a context manager measuring a stage in the active metrics, if any."""
+    metrics = _metrics.get()
+
+    if metrics is None:
+        return _NULL_STAGE
+
+    return metrics.stage(name, rows, nbytes)
+
+
+@contextlib.contextmanager
+def collect(
+    sink: Callable[[StageRecord], None] | None = None,
+    *,
+    allocations: bool = False,
+    metrics: Metrics | None = None,
+) -> Iterator[Metrics]:
+    """Collect stages run inside the block (in this thread or task) into Metrics.
+
+    Yields the Metrics, a new one unless metrics is given.
+    """
+    metrics = metrics if metrics else Metrics(sink, allocations=allocations)
+    start_tracing = metrics.allocations and not tracemalloc.is_tracing()
+    token = _metrics.set(metrics)
+
+    if start_tracing:
+        tracemalloc.start()
+
+    try:
+        yield metrics
+    finally:
+        _metrics.reset(token)
+
+        if start_tracing:
+            tracemalloc.stop()
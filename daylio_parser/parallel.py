@@ -0,0 +1,54 @@
+"""Splitting of large exports into chunks that can be parsed in parallel."""
+
+import os
+import pathlib
+
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+
+BLOCK_SIZE = 1 << 24
+
+
+def row_boundaries(path: str | os.PathLike, targets: list[int]) -> list[int]:
+    """Return the offset of the first CSV row starting at or after each target offset.
+
+    Targets have to be sorted. Newlines inside quoted fields (e.g. multi-line
+    notes) are not row boundaries, which is tracked by the parity of quotes
+    from the start of the file. Targets without a following row give the file size.
+    """
+    boundaries = []
+    pending = list(targets)
+    quotes_parity = 0
+    offset = 0
+
+    with pathlib.Path(path).open("rb") as fread:
+        while pending and (block := fread.read(BLOCK_SIZE)):
+            data = np.frombuffer(block, dtype=np.uint8)
+            quotes = np.flatnonzero(data == ord('"'))
+            newlines = np.flatnonzero(data == ord("\n"))
+
+            # A newline ends a row if there's an even number of quotes before it
+            parity = (quotes_parity + np.searchsorted(quotes, newlines)) % 2
+            row_starts = newlines[parity == 0] + offset + 1
+
+            while pending and pending[0] <= offset + len(block):
+                target = pending[0]
+
+                if target == 0:
+                    boundaries.append(0)
+                    pending.pop(0)
+                    continue
+
+                index = np.searchsorted(row_starts, target)
+
+                if index == len(row_starts):
+                    break
+
+                boundaries.append(int(row_starts[index]))
+                pending.pop(0)
+
+            quotes_parity = (quotes_parity + len(quotes)) % 2
+            offset += len(block)
+
+    return boundaries + [offset] * len(pending)
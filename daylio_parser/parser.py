@@ -1,11 +1,30 @@
 """Export CSV parser."""
 
+import contextlib
 import csv
 import datetime
+import io
+import itertools
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+from collections.abc import Iterator
+from typing import TextIO
 
 from pydantic import BaseModel
 
+from .activities import ActivityVocabulary
+from .cache import cache_path, fingerprint
 from .config import Mood, MoodConfig
+from .lazy import LazyModule
+from .metrics import stage
+from .parallel import row_boundaries
+from .timestamps import TimestampDecoder
+
+futures = LazyModule("concurrent.futures")
+np = LazyModule("numpy")
 
 
 class Entry(BaseModel):
@@ -16,52 +35,647 @@ class Entry(BaseModel):
     activities: list[str]
     notes: str = ""
 
+    @classmethod
+    def trusted(
+        cls: type["Entry"],
+        datetime: datetime.datetime,
+        mood: Mood,
+        activities: list[str],
+        notes: str = "",
+    ) -> "Entry":
+        """Create an entry from values that are known to be valid, skipping validation.
+
+        This is used for parser output, where moods come from a validated MoodConfig.
+        All fields are set, each entry gets its own copy of the set of field names,
+        so entries are equal to and behave like validated ones.
+        """
+        entry = cls.__new__(cls)
+        object.__setattr__(
+            entry,
+            "__dict__",
+            {"datetime": datetime, "mood": mood, "activities": activities, "notes": notes},
+        )
+        object.__setattr__(entry, "__pydantic_fields_set__", set(_ENTRY_FIELDS))
+        object.__setattr__(entry, "__pydantic_extra__", None)
+        object.__setattr__(entry, "__pydantic_private__", None)
+
+        return entry
+
+
+_ENTRY_FIELDS = set(Entry.model_fields)
+
+
+# Numeric columns of EntryTable that are saved as .npy files
+TABLE_COLUMNS = (
+    "datetimes",
+    "mood_ids",
+    "levels",
+    "activity_offsets",
+    "activity_ids",
+    "note_offsets",
+)
+
+# Bits in the activity bitmasks of EntryTable
+BITMASK_BITS = 64
+
+
+class EntryTable:
+    """Columnar storage of entries backed by NumPy arrays.
+
+    Timestamps are stored as datetime64[m], moods as indexes into ``moods``
+    (with their levels precomputed), activities and notes as offsets
+    into shared buffers. Entry objects are only created on access.
+    """
+
+    def __init__(  # noqa: PLR0913 (one argument per column)
+        self,
+        datetimes: "np.ndarray",
+        mood_ids: "np.ndarray",
+        moods: list[Mood],
+        activity_offsets: "np.ndarray",
+        activity_ids: "np.ndarray",
+        activity_names: list[str],
+        note_offsets: "np.ndarray",
+        notes: str,
+        levels: "np.ndarray | None" = None,
+    ) -> None:
+        self.datetimes = datetimes
+        self.mood_ids = mood_ids
+        self.moods = moods
+
+        if levels is None:
+            levels = np.array([mood.level for mood in moods], dtype=np.int8)[mood_ids]
+
+        self.levels = levels
+        self.activity_offsets = activity_offsets
+        self.activity_ids = activity_ids
+        self.activity_names = activity_names
+        self.note_offsets = note_offsets
+        self.notes = notes
+
+    @classmethod
+    def from_columns(  # noqa: PLR0913 (one argument per column)
+        cls: type["EntryTable"],
+        datetimes: "np.ndarray",
+        moods: list[Mood],
+        activity_ids: list[tuple[int, ...]],
+        notes: list[str],
+        activity_names: list[str],
+        mood_ids: "np.ndarray | None" = None,
+    ) -> "EntryTable":
+        """Build the table from a datetime64 array and per-row moods, activities and notes.
+
+        Activities of each row are IDs, i.e. indexes into activity_names.
+        If mood_ids are given, moods are the moods they index (e.g. MoodConfig.moods
+        with MoodConfig.codes), otherwise moods has one Mood per row.
+        """
+        if mood_ids is None:
+            mood_map = {}
+            unique_moods = []
+            mood_ids = np.empty(len(moods), dtype=np.int16)
+
+            for i, mood in enumerate(moods):
+                if mood.name not in mood_map:
+                    mood_map[mood.name] = len(unique_moods)
+                    unique_moods.append(mood)
+
+                mood_ids[i] = mood_map[mood.name]
+        else:
+            unique_moods = list(moods)
+
+        activity_counts = np.fromiter(
+            map(len, activity_ids),
+            dtype=np.int64,
+            count=len(activity_ids),
+        )
+        note_lengths = np.fromiter(map(len, notes), dtype=np.int64, count=len(notes))
+
+        return cls(
+            datetimes=np.asarray(datetimes, dtype="datetime64[m]"),
+            mood_ids=mood_ids,
+            moods=unique_moods,
+            activity_offsets=_offsets(activity_counts),
+            activity_ids=np.fromiter(
+                itertools.chain.from_iterable(activity_ids),
+                dtype=np.int32,
+                count=int(activity_counts.sum()),
+            ),
+            activity_names=activity_names,
+            note_offsets=_offsets(note_lengths),
+            notes="".join(notes),
+        )
+
+    @classmethod
+    def from_entries(cls: type["EntryTable"], entries: list[Entry]) -> "EntryTable":
+        """Build the table from a list of Entry objects."""
+        vocabulary = ActivityVocabulary()
+
+        return cls.from_columns(
+            np.array([entry.datetime for entry in entries], dtype="datetime64[m]"),
+            [entry.mood for entry in entries],
+            [vocabulary.encode(entry.activities) for entry in entries],
+            [entry.notes for entry in entries],
+            vocabulary.names,
+        )
+
+    @classmethod
+    def concat(cls: type["EntryTable"], tables: list["EntryTable"]) -> "EntryTable":
+        """Concatenate tables, merging their moods and activity names."""
+        mood_map = {}
+        moods = []
+        activity_map = {}
+        activity_names = []
+
+        mood_ids = []
+        activity_ids = []
+        activity_counts = []
+
+        for table in tables:
+            for mood in table.moods:
+                if mood.name not in mood_map:
+                    mood_map[mood.name] = len(moods)
+                    moods.append(mood)
+
+            for name in table.activity_names:
+                if name not in activity_map:
+                    activity_map[name] = len(activity_names)
+                    activity_names.append(name)
+
+            mood_remap = np.array([mood_map[mood.name] for mood in table.moods], dtype=np.int16)
+            activity_remap = np.array(
+                [activity_map[name] for name in table.activity_names],
+                dtype=np.int32,
+            )
+
+            mood_ids.append(mood_remap[table.mood_ids])
+            activity_ids.append(activity_remap[table.activity_ids])
+            activity_counts.append(np.diff(table.activity_offsets))
+
+        return cls(
+            datetimes=np.concatenate([table.datetimes for table in tables]),
+            mood_ids=np.concatenate(mood_ids),
+            moods=moods,
+            activity_offsets=_offsets(np.concatenate(activity_counts)),
+            activity_ids=np.concatenate(activity_ids),
+            activity_names=activity_names,
+            note_offsets=_offsets(
+                np.concatenate([np.diff(table.note_offsets) for table in tables]),
+            ),
+            notes="".join(table.notes for table in tables),
+        )
+
+    def save(self, path: str | os.PathLike, key: str = "") -> None:
+        """Save the table into a directory, optionally with a cache key.
+
+        Numeric columns are saved as .npy files, so that they can be memory-mapped
+        by EntryTable.load. Notes are saved as text, names and the key as JSON.
+        """
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write into a directory unique to this writer, so that readers never see
+        # partial data and concurrent writers don't touch each other's files
+        tmp_path = pathlib.Path(tempfile.mkdtemp(prefix=f"{path.name}.", dir=path.parent))
+
+        try:
+            for column in TABLE_COLUMNS:
+                np.save(tmp_path / f"{column}.npy", getattr(self, column))
+
+            with (tmp_path / "notes.txt").open("w", encoding="utf-8", newline="") as fwrite:
+                fwrite.write(self.notes)
+
+            with (tmp_path / "meta.json").open("w", encoding="utf-8") as fwrite:
+                meta = {
+                    "key": key,
+                    "moods": [mood.name for mood in self.moods],
+                    "activities": self.activity_names,
+                }
+                json.dump(meta, fwrite)
+
+            try:
+                tmp_path.rename(path)
+            except OSError:
+                if not path.exists():
+                    raise
+
+                # Move the existing table aside under a name unique to this writer
+                old_path = tmp_path.with_name(f"{tmp_path.name}.old")
+                path.rename(old_path)
+                tmp_path.rename(path)
+                shutil.rmtree(old_path, ignore_errors=True)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @classmethod
+    def load(
+        cls: type["EntryTable"],
+        path: str | os.PathLike,
+        config: MoodConfig,
+        key: str | None = None,
+        *,
+        mmap: bool = True,
+    ) -> "EntryTable | None":
+        """Load a table saved by EntryTable.save, moods are looked up in config.
+
+        With mmap=True, numeric columns are read-only np.memmap arrays, so processes
+        loading the same table share the page cache instead of holding copies.
+        If key is given and it doesn't match the saved one, None is returned.
+        """
+        path = pathlib.Path(path)
+
+        with (path / "meta.json").open(encoding="utf-8") as fread:
+            meta = json.load(fread)
+
+        if key is not None and meta["key"] != key:
+            return None
+
+        with (path / "notes.txt").open(encoding="utf-8", newline="") as fread:
+            notes = fread.read()
+
+        columns = {
+            column: np.load(
+                path / f"{column}.npy",
+                mmap_mode="r" if mmap else None,
+                allow_pickle=False,
+            )
+            for column in TABLE_COLUMNS
+        }
+
+        return cls(
+            moods=[config.get(name) for name in meta["moods"]],
+            activity_names=meta["activities"],
+            notes=notes,
+            **columns,
+        )
+
+    def __len__(self) -> int:
+        return len(self.datetimes)
+
+    def between(
+        self,
+        start: datetime.date | None = None,
+        end: datetime.date | None = None,
+    ) -> "EntryTable":
+        """Return entries from start to end (both days included) as a table.
+
+        The table has to be sorted by time (oldest first, as loaded by Parser),
+        the range is found by binary search. Numeric columns of the result
+        are views of this table, only offsets and notes of the range are copied.
+        """
+        first, stop = 0, len(self)
+
+        if start is not None:
+            start = np.datetime64(start, "D").astype("datetime64[m]")
+            first = int(np.searchsorted(self.datetimes, start))
+
+        if end is not None:
+            end = (np.datetime64(end, "D") + 1).astype("datetime64[m]")
+            stop = int(np.searchsorted(self.datetimes, end))
+
+        stop = max(stop, first)
+        activity_offsets = self.activity_offsets[first : stop + 1]
+        note_offsets = self.note_offsets[first : stop + 1]
+
+        return EntryTable(
+            datetimes=self.datetimes[first:stop],
+            mood_ids=self.mood_ids[first:stop],
+            moods=self.moods,
+            activity_offsets=activity_offsets - activity_offsets[0],
+            activity_ids=self.activity_ids[activity_offsets[0] : activity_offsets[-1]],
+            activity_names=self.activity_names,
+            note_offsets=note_offsets - note_offsets[0],
+            notes=self.notes[note_offsets[0] : note_offsets[-1]],
+            levels=self.levels[first:stop],
+        )
+
+    def is_sorted(self) -> bool:
+        """Return True if the entries are sorted by time, oldest first."""
+        return bool(np.all(self.datetimes[1:] >= self.datetimes[:-1]))
+
+    def __getitem__(self, i: int) -> Entry:
+        if i < 0:
+            i += len(self)
+
+        if not 0 <= i < len(self):
+            msg = "EntryTable index out of range"
+            raise IndexError(msg)
+
+        return Entry.trusted(
+            datetime=self.datetimes[i].item(),
+            mood=self.moods[self.mood_ids[i]],
+            activities=self.activities(i),
+            notes=self.note(i),
+        )
+
+    def __iter__(self) -> Iterator[Entry]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def activity_matrix(self) -> "np.ndarray":
+        """Return a boolean (entries x activities) incidence matrix."""
+        matrix = np.zeros((len(self), len(self.activity_names)), dtype=bool)
+        matrix[self.__activity_rows(), self.activity_ids] = True
+
+        return matrix
+
+    def activity_bitmasks(self) -> "np.ndarray":
+        """Return a uint64 bitmask of activities for each entry (bit i = activity ID i).
+
+        Raises ValueError if any activity ID is 64 or higher. Tables loaded by one
+        parser share its vocabulary, so the IDs depend on everything it loaded before.
+        """
+        if len(self.activity_ids) and self.activity_ids.max() >= BITMASK_BITS:
+            msg = f"Bitmasks support at most {BITMASK_BITS} activities (IDs below {BITMASK_BITS})"
+            raise ValueError(msg)
+
+        bitmasks = np.zeros(len(self), dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), self.activity_ids.astype(np.uint64))
+        np.bitwise_or.at(bitmasks, self.__activity_rows(), bits)
+
+        return bitmasks
+
+    def __activity_rows(self) -> "np.ndarray":
+        """Return the entry index of each item in activity_ids."""
+        return np.repeat(np.arange(len(self)), np.diff(self.activity_offsets))
+
+    def activities(self, i: int) -> list[str]:
+        """Return activity names of the i-th entry."""
+        ids = self.activity_ids[self.activity_offsets[i] : self.activity_offsets[i + 1]]
+
+        return [self.activity_names[activity_id] for activity_id in ids]
+
+    def note(self, i: int) -> str:
+        """Return the note of the i-th entry."""
+        return self.notes[self.note_offsets[i] : self.note_offsets[i + 1]]
+
+    def to_entries(self) -> list[Entry]:
+        """Convert the whole table into a list of Entry objects."""
+        return list(self)
+
+
+def _offsets(counts: "np.ndarray") -> "np.ndarray":
+    """Turn per-row item counts into CSR-style offsets (one longer than counts)."""
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return offsets
+
 
 class Parser:
     """Parser for the CSV file."""
 
     def __init__(self, config=None):
-        """Create the object. If config is None, a default MoodConfig is created."""
+        """Create the object. If config is None, a default MoodConfig is created.
+
+        Activities are interned in the activities vocabulary, which is shared
+        by everything loaded with this parser, so activity IDs of its tables match.
+        """
         if not config:
             self.config = MoodConfig()
         else:
             self.config = config
 
-    def load_csv(self, path):
-        """Load data from a CSV file."""
-        with open(path) as fread:
-            return self.load_from_buffer(fread)
+        self.activities = ActivityVocabulary()
+
+    def load_csv(
+        self,
+        path: str | os.PathLike,
+        *,
+        cache: bool = False,
+        cache_dir: str | os.PathLike | None = None,
+    ) -> list[Entry]:
+        """Load data from a CSV file.
+
+        With cache=True, the parsed data is cached in a binary file
+        (next to the CSV or in cache_dir), see load_table.
+        """
+        if cache:
+            return self.load_table(path, cache=cache, cache_dir=cache_dir).to_entries()
+
+        path = pathlib.Path(path)
+
+        with stage("parser.load_csv", nbytes=path.stat().st_size) as record:
+            with path.open() as fread:
+                entries = self.load_from_buffer(fread)
+
+            record.rows = len(entries)
+
+        return entries
 
     def load_from_buffer(self, f):
         """Load data from any file-like object."""
-        entries = []
-        csv_reader = csv.DictReader(f, delimiter=",", quotechar='"')
+        with stage("parser.entries") as record:
+            entries = list(self.iter_entries(f))
+            record.rows = len(entries)
 
-        for row in csv_reader:
-            mood = self.config.get(row["mood"])
+        # Will be oldest to newest
+        entries.reverse()
 
-            # Create entry object
-            dt = datetime.datetime.strptime(row["full_date"], "%Y-%m-%d")
+        return entries
 
-            try:
-                t = datetime.datetime.strptime(row["time"], "%I:%M %p")
-            except ValueError:
-                t = datetime.datetime.strptime(row["time"], "%H:%M")
-
-            # TODO: There has to be a better way
-            t = datetime.time(hour=t.hour, minute=t.minute)
-            dt = dt.combine(dt, t)
-
-            entry = Entry(
-                datetime=dt,
-                mood=mood,
-                activities=[] if row["activities"] == "" else row["activities"].split(" | "),
-                notes=row["note"],
+    def iter_csv(self, path: str | os.PathLike, *, oldest_first: bool = False) -> Iterator[Entry]:
+        """Iterate over entries in a CSV file, see iter_entries."""
+        with pathlib.Path(path).open() as fread:
+            yield from self.iter_entries(fread, oldest_first=oldest_first)
+
+    def iter_entries(self, f: TextIO, *, oldest_first: bool = False) -> Iterator[Entry]:
+        """Yield entries from any file-like object as they are read.
+
+        Entries are yielded in the order of the file (Daylio exports newest first).
+        With oldest_first=True, the order of the file is detected from the first
+        timestamps: files that are already oldest first are still streamed,
+        newest first files have to be read whole before they can be reversed.
+        """
+        decoder = TimestampDecoder()
+        entries = (
+            Entry.trusted(
+                datetime=decoder.decode(date, time),
+                mood=self.config.get(mood),
+                activities=self.activities.decode(activity_ids),
+                notes=notes,
             )
+            for date, time, mood, activity_ids, notes in self.__read_rows(f)
+        )
+
+        if not oldest_first:
+            yield from entries
+            return
+
+        # Read until the first entry with a different timestamp
+        head = []
+
+        for entry in entries:
+            head.append(entry)
+
+            if entry.datetime != head[0].datetime:
+                break
+
+        if head and head[-1].datetime < head[0].datetime:
+            buffered = head + list(entries)
+            buffered.reverse()
+
+            yield from buffered
+        else:
+            yield from head
+            yield from entries
+
+    def load_table(
+        self,
+        path: str | os.PathLike,
+        *,
+        cache: bool = False,
+        cache_dir: str | os.PathLike | None = None,
+        workers: int = 1,
+    ) -> EntryTable:
+        """Load data from a CSV file into an EntryTable.
+
+        With cache=True, the table is saved into a binary cache next to the CSV
+        (or in cache_dir) and loaded from it as long as the CSV and the mood
+        config are unchanged. Tables loaded from the cache are memory-mapped.
+
+        With workers > 1, the file is split into chunks at row boundaries
+        which are parsed in a process pool. The result is the same as
+        with a single worker.
+        """
+        path = pathlib.Path(path)
+
+        if not cache:
+            with stage("parser.load_table", nbytes=path.stat().st_size) as record:
+                if workers > 1:
+                    table = self.__load_table_parallel(path, workers)
+                else:
+                    with path.open() as fread:
+                        table = self.load_table_from_buffer(fread)
+
+                record.rows = len(table)
+
+            return table
+
+        with stage("parser.cache_load") as record:
+            key = fingerprint(path, self.config)
+            table_path = cache_path(path, cache_dir)
+
+            try:
+                table = EntryTable.load(table_path, self.config, key)
+            except (OSError, ValueError):
+                # Missing or unreadable cache
+                table = None
 
-            entries.append(entry)
+            record.rows = len(table) if table is not None else 0
+
+        if table is not None:
+            return self.share_activities(table)
+
+        table = self.load_table(path, workers=workers)
+
+        # A failed cache write (e.g. a concurrent writer won) doesn't fail the load
+        with stage("parser.cache_save", rows=len(table)), contextlib.suppress(OSError):
+            table.save(table_path, key)
+
+        return table
+
+    def load_table_from_buffer(self, f: TextIO) -> EntryTable:
+        """Load data from any file-like object into an EntryTable."""
+        with stage("parser.read") as record:
+            rows = list(self.__read_rows(f))
+            record.rows = len(rows)
 
         # Will be oldest to newest
-        entries.reverse()
+        rows.reverse()
 
-        return entries
+        columns = [list(column) for column in zip(*rows, strict=True)] or [[] for _ in range(5)]
+        dates, times, moods, activity_ids, notes = columns
+
+        with stage("parser.timestamps", rows=len(rows)):
+            datetimes = TimestampDecoder().decode_many(dates, times)
+
+        with stage("parser.moods", rows=len(rows)):
+            mood_ids = self.config.codes(moods)
+
+        with stage("parser.table", rows=len(rows)):
+            return EntryTable.from_columns(
+                datetimes,
+                self.config.moods,
+                activity_ids,
+                notes,
+                list(self.activities.names),
+                mood_ids=mood_ids,
+            )
+
+    def __load_table_parallel(self, path: str | os.PathLike, workers: int) -> EntryTable:
+        """Parse chunks of a CSV file in worker processes and merge them."""
+        path = pathlib.Path(path)
+        size = path.stat().st_size
+        targets = [1, *(max(size * i // workers, 1) for i in range(1, workers))]
+
+        # The first boundary is the end of the header
+        header_end, *starts = row_boundaries(path, targets)
+        starts = sorted({max(start, header_end) for start in [header_end, *starts]})
+        chunks = [
+            (start, end)
+            for start, end in zip(starts, [*starts[1:], size], strict=True)
+            if start < end
+        ]
+
+        if len(chunks) <= 1:
+            return self.load_table(path)
+
+        with path.open("rb") as fread:
+            header = fread.read(header_end)
+
+        jobs = [(path, start, end, header, self.config) for start, end in chunks]
+
+        with stage("parser.chunks", nbytes=size) as record:
+            with futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                # In the order of the file, i.e. newest first
+                tables = list(pool.map(_parse_chunk, jobs))
+
+            record.rows = sum(map(len, tables))
+
+        # Intern activities in the order of the file, like when parsing it at once
+        for table in tables:
+            self.activities.encode(table.activity_names)
+
+        # Every chunk is already oldest to newest
+        merged = EntryTable.concat(tables[::-1])
+        merged.moods = [self.config.get(mood.name) for mood in merged.moods]
+
+        return self.share_activities(merged)
+
+    def share_activities(self, table: EntryTable) -> EntryTable:
+        """Remap activity IDs of a table parsed elsewhere to IDs of this parser's vocabulary.
+
+        Used for tables from the cache, other processes or other parsers. The table
+        is changed in place and returned.
+        """
+        remap = np.array(self.activities.encode(table.activity_names), dtype=np.int32)
+
+        # The IDs are the same if the names were interned in the same order (e.g. a new parser)
+        if not np.array_equal(remap, np.arange(len(remap))):
+            table.activity_ids = remap[table.activity_ids]
+
+        table.activity_names = list(self.activities.names)
+
+        return table
+
+    def __read_rows(self, f: TextIO) -> Iterator[tuple[str, str, str, tuple[int, ...], str]]:
+        """Yield (full_date, time, mood name, activity IDs, notes) for each CSV row."""
+        csv_reader = csv.DictReader(f, delimiter=",", quotechar='"')
+
+        for row in csv_reader:
+            activity_ids = self.activities.parse(row["activities"])
+
+            yield row["full_date"], row["time"], row["mood"], activity_ids, row["note"]
+
+
+def _parse_chunk(job: tuple) -> EntryTable:
+    """Parse rows between two byte offsets of a CSV file (run in worker processes)."""
+    path, start, end, header, config = job
+
+    with pathlib.Path(path).open("rb") as fread:
+        fread.seek(start)
+        data = header + fread.read(end - start)
+
+    # Decode the same way as open() in text mode
+    with io.TextIOWrapper(io.BytesIO(data)) as f:
+        return Parser(config).load_table_from_buffer(f)
@@ -2,101 +2,170 @@
 
 import datetime
 
-import numpy as np
-
-from . import stats
 from .config import MoodConfig
-from .parser import Entry
+from .daily import DailySeries
+from .lazy import LazyModule
+from .metrics import stage
+from .parser import Entry, EntryTable
+from .stats import Stats
+
+np = LazyModule("numpy")
+
+# Steps of a day are at least one minute long
+MAX_STEPS = 24 * 60
 
 
 class PlotData:
     """Class to operate on Entries and prepare them for plotting with matplotlib."""
 
-    def __init__(self, entries: list[Entry], config: MoodConfig = None):
-        """Create the object. If config is None, a default MoodConfig is created."""
+    def __init__(
+        self,
+        entries: list[Entry] | EntryTable,
+        config: MoodConfig = None,
+        stats: Stats = None,
+    ) -> None:
+        """Create the object. If config is None, a default MoodConfig is created.
+
+        Pass an existing Stats object for the same entries to share its cached series.
+        """
         self.entries = entries
         self.config = config
 
         if not self.config:
             self.config = MoodConfig()
 
-        self.__stats = stats.Stats(entries, config)
-
-    def split_into_bands(self, moods):
-        """Split input entries into bands given by config."""
-        # {mood_name: masked_array}
-        split_data = dict.fromkeys([mood.name for mood in self.config.moods])
-
-        for mood in self.config.moods:
-            # Upper bound
-            masked_data = np.ma.masked_where(moods >= mood.boundaries[1], moods)
+        self.__stats = stats if stats else Stats(entries, config)
 
-            # Lower bound
-            masked_data = np.ma.masked_where(moods < mood.boundaries[0], masked_data)
+    def between(
+        self,
+        start: datetime.date | None = None,
+        end: datetime.date | None = None,
+    ) -> "PlotData":
+        """Return plot data of entries from start to end (both days included).
 
-            split_data[mood.name] = masked_data
+        See Stats.between, entries have to be sorted by time.
+        """
+        stats = self.__stats.between(start, end)
 
-        return split_data
+        return PlotData(stats.entries, self.config, stats)
 
-    def interpolate(self, avg_moods=None, interpolate_steps: int = 360):
-        """Interpolate missing values between midnights."""
+    def split_into_bands(self, moods):
+        """Split input entries into bands given by config."""
+        with stage("plot.split_into_bands", rows=len(moods)):
+            # Masked arrays by mood name
+            split_data = dict.fromkeys([mood.name for mood in self.config.moods])
+
+            for mood in self.config.moods:
+                # Upper bound
+                masked_data = np.ma.masked_where(moods >= mood.boundaries[1], moods)
+
+                # Lower bound
+                masked_data = np.ma.masked_where(moods < mood.boundaries[0], masked_data)
+
+                split_data[mood.name] = masked_data
+
+            return split_data
+
+    def classify_bands(self, moods: "np.ndarray") -> "np.ndarray":
+        """Return the band index of each mood value, -1 for values outside all bands.
+
+        Bands are the distinct mood boundaries in config, from the lowest one
+        (see band_boundaries), i.e. band i is level i + 1. Every value
+        is classified in a single pass.
+        """
+        boundaries = self.config.level_boundaries[1:]
+        edges = np.append(boundaries[:, 0], boundaries[-1, 1])
+
+        # Bin i means edges[i - 1] <= mood < edges[i], 0 and len(edges) are outside
+        bins = np.digitize(moods, edges)
+        bands = (bins - 1).astype(np.int8)
+        bands[(bins == 0) | (bins == len(edges))] = -1
+
+        return bands
+
+    def band_boundaries(self) -> list[tuple[float, float]]:
+        """Return the distinct boundaries of moods in config, sorted from the lowest."""
+        return sorted({mood.boundaries for mood in self.config.moods})
+
+    def split_into_segments(self, moods: "np.ndarray") -> dict[str, "np.ndarray"]:
+        """Split moods into contiguous segments of bands given by config.
+
+        Returns {mood name: array of [start, stop) index pairs}, so that each
+        band can be drawn from views like moods[start:stop] without creating
+        masked copies of the whole series.
+        """
+        with stage("plot.split_into_segments", rows=len(moods)):
+            bands = self.classify_bands(moods)
+
+            # Start of each run of samples in the same band
+            starts = np.flatnonzero(np.diff(bands, prepend=-2))
+            stops = np.append(starts[1:], len(bands))[: len(starts)]
+            run_bands = bands[starts]
+
+            segments = {}
+            band_index = {boundaries: i for i, boundaries in enumerate(self.band_boundaries())}
+
+            for mood in self.config.moods:
+                in_band = run_bands == band_index[mood.boundaries]
+                segments[mood.name] = np.column_stack((starts[in_band], stops[in_band]))
+
+            return segments
+
+    def interpolate(
+        self,
+        avg_moods: list[tuple[datetime.date, float]] | DailySeries | None = None,
+        interpolate_steps: int = 360,
+        dtype: "np.typing.DTypeLike" = "float64",
+    ) -> tuple["np.ndarray", "np.ndarray"]:
+        """Interpolate missing values between midnights.
+
+        Each day is split into interpolate_steps steps, moving linearly
+        from the day's mood towards the mood of the next day in avg_moods.
+        Days without a mood (NaN) are skipped, a day followed by one
+        keeps its mood for the whole day. avg_moods can also be a DailySeries,
+        where days without entries are NaN.
+
+        Returns (datetime64[m] array, array of moods in the given dtype).
+        """
         if avg_moods is None:
             avg_moods = self.__stats.average_moods()
 
-        steps = int(interpolate_steps)
-
-        if steps > 1440:
-            raise ValueError("Max number of steps is 1440")
-
-        dates = []
-        moods = []
-        step = 1440 // steps  # Step size in minutes
-
-        # Add one day with the same mood, so that we have
-        # the last day included in the charts too
-        last_point = avg_moods[-1]
-        new_point = (datetime.timedelta(days=1) + last_point[0], last_point[1])
-
-        if isinstance(avg_moods, list):
-            avg_moods.append(new_point)
-        else:
-            np.append(avg_moods, new_point)
-
-        for i in range(len(avg_moods)):  # pylint: disable=consider-using-enumerate
-            current_point = avg_moods[i]
-
-            if np.isnan(current_point[1]):
-                continue
+        with stage("plot.interpolate", rows=len(avg_moods)):
+            steps = int(interpolate_steps)
 
-            try:
-                next_point = avg_moods[i + 1]
-            except IndexError:
-                # Add last day as the date on midnight
-                next_time = datetime.time(hour=0, minute=0)
-                next_dt = datetime.datetime.combine(current_point[0], next_time)
+            if steps > MAX_STEPS:
+                msg = f"Max number of steps is {MAX_STEPS}"
+                raise ValueError(msg)
 
-                dates.append(next_dt)
-                moods.append(current_point[1])
+            if len(avg_moods) == 0:
+                return np.array([], dtype="datetime64[m]"), np.array([], dtype=dtype)
 
-                break
+            step = MAX_STEPS // steps  # Step size in minutes
 
-            value_diff = next_point[1] - current_point[1]  # Mood difference between days
-            time_diff = steps  # Time difference a.k.a. number of buckets
-            coef = value_diff / time_diff  # How much the mood changes in one step
+            if isinstance(avg_moods, DailySeries):
+                days, moods = avg_moods.dates, avg_moods.means
+            else:
+                days, moods = zip(*avg_moods, strict=True)
+                days = np.array(days, dtype="datetime64[D]")
+                moods = np.array(moods, dtype=np.float64)
 
-            for step_n in range(steps):
-                # Simple linear interpolation
-                next_value = step_n * coef + current_point[1]
+            # The last day keeps its mood, as if the next day had the same mood,
+            # so that we have the last day included in the charts too
+            next_moods = np.append(moods[1:], moods[-1])
+            next_moods = np.where(np.isnan(next_moods), moods, next_moods)
 
-                # step*step_n == number of minutes in the current day
-                # just split it into hours and minutes for time object
-                hour = 0 if step_n == 0 else (step * step_n) // 60
-                minute = 0 if step_n == 0 else (step * step_n) % 60
+            keep = ~np.isnan(moods)
+            days, moods, next_moods = days[keep], moods[keep], next_moods[keep]
 
-                next_time = datetime.time(hour=int(hour), minute=int(minute))
-                next_dt = datetime.datetime.combine(current_point[0], next_time)
+            # One row per day, one column per step
+            step_n = np.arange(steps)
+            coefs = (next_moods - moods) / steps  # How much the mood changes in one step
+            values = moods[:, np.newaxis] + coefs[:, np.newaxis] * step_n
+            dates = days.astype("datetime64[m]")[:, np.newaxis] + step_n * np.timedelta64(step, "m")
 
-                dates.append(next_dt)
-                moods.append(next_value)
+            # Add the day after the last one as the date on midnight
+            if len(days):
+                dates = np.append(dates, days[-1] + np.timedelta64(1, "D"))
+                values = np.append(values, moods[-1])
 
-        return np.array(dates), np.array(moods)
+            return dates.ravel().astype("datetime64[m]"), values.ravel().astype(dtype)
@@ -0,0 +1,249 @@
+"""Rolling statistics of daily series on a dense calendar.
+
+Series are float64 arrays with one value per calendar day, where days
+without entries are NaN. How the missing days are treated is given by gaps:
+
+- "nan": windows with a missing day are NaN
+- "fill": missing days take the value of the last day with entries
+- "time": windows of size calendar days use only the days with entries in them
+"""
+
+import bisect
+
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+
+GAPS = ("nan", "fill", "time")
+STATISTICS = ("mean", "std", "min", "max", "median", "ewma")
+
+# Smaller variances computed from sums are only rounding errors (of constant windows)
+MIN_VARIANCE = 1e-12
+
+
+def fill_gaps(values: "np.ndarray") -> "np.ndarray":
+    """Return values with NaNs replaced by the last preceding value that isn't NaN."""
+    present = ~np.isnan(values)
+    last = np.maximum.accumulate(np.where(present, np.arange(len(values)), 0))
+
+    return np.where(present[last], values[last], np.nan)
+
+
+def rolling(values: "np.ndarray", size: int, stat: str = "mean", gaps: str = "nan") -> "np.ndarray":
+    """Compute a rolling statistic over windows of size days ending on each day.
+
+    The first size - 1 days don't have a full window and are NaN, except for
+    "ewma", which is the exponentially weighted mean with a span of size days.
+    """
+    if size < 1:
+        msg = "Window size has to be at least 1"
+        raise ValueError(msg)
+
+    if gaps not in GAPS:
+        msg = f"Unknown gap handling '{gaps}'"
+        raise ValueError(msg)
+
+    if stat not in STATISTICS:
+        msg = f"Unknown statistic '{stat}'"
+        raise ValueError(msg)
+
+    values = np.asarray(values, dtype=np.float64)
+
+    if gaps == "fill":
+        values = fill_gaps(values)
+
+    if stat == "ewma":
+        return ewma(values, size, restart=gaps == "nan")
+
+    present = ~np.isnan(values)
+    counts = _window_sums(present.astype(np.int64), size)
+    result = np.full(len(values), np.nan)
+
+    if len(values) < size:
+        return result
+
+    window = _WINDOW_STATISTICS[stat](values, present, counts, size)
+    valid = counts > 0 if gaps == "time" else counts == size
+    result[size - 1 :] = np.where(valid, window, np.nan)
+
+    return result
+
+
+def ewma(values: "np.ndarray", size: int, *, restart: bool = False) -> "np.ndarray":
+    """Compute the exponentially weighted mean with a span of size days.
+
+    Missing days (NaN) have no weight, but the weights of older days still
+    decay over them. With restart, missing days are NaN and the mean
+    starts over after each of them.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(values)
+    decay = 1 - 2 / (size + 1)
+
+    weighted = _decay_filter(np.where(present, values, 0), decay)
+    weights = _decay_filter(present.astype(np.float64), decay)
+
+    if restart:
+        # Subtract what was accumulated up to the last missing day
+        index = np.arange(len(values))
+        last_gap = np.maximum.accumulate(np.where(present, -1, index))
+        since_gap = np.where(last_gap >= 0, index - last_gap, 0)
+        carried = np.where(last_gap >= 0, decay**since_gap, 0)
+        weighted -= carried * weighted[np.maximum(last_gap, 0)]
+        weights -= carried * weights[np.maximum(last_gap, 0)]
+        weights[~present] = 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(weights > 0, weighted / weights, np.nan)
+
+
+def _window_sums(values: "np.ndarray", size: int) -> "np.ndarray":
+    """Return sums of all full windows of size values."""
+    sums = np.concatenate(([0], np.cumsum(values)))
+
+    return sums[size:] - sums[:-size]
+
+
+def _window_moments(
+    values: "np.ndarray",
+    present: "np.ndarray",
+    counts: "np.ndarray",
+    size: int,
+) -> tuple["np.ndarray", "np.ndarray", float]:
+    """Return (means, mean squares) of centered values in windows and the center.
+
+    Sums are taken from prefix sums, the values are centered for precision.
+    """
+    center = np.nanmean(values) if present.any() else 0
+    centered = np.where(present, values - center, 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = _window_sums(centered, size) / counts
+        squares = _window_sums(centered**2, size) / counts
+
+    return means, squares, center
+
+
+def _window_mean(
+    values: "np.ndarray",
+    present: "np.ndarray",
+    counts: "np.ndarray",
+    size: int,
+) -> "np.ndarray":
+    means, _, center = _window_moments(values, present, counts, size)
+
+    return means + center
+
+
+def _window_std(
+    values: "np.ndarray",
+    present: "np.ndarray",
+    counts: "np.ndarray",
+    size: int,
+) -> "np.ndarray":
+    means, squares, _ = _window_moments(values, present, counts, size)
+    variances = squares - means**2
+
+    return np.sqrt(np.where(variances > MIN_VARIANCE, variances, 0))
+
+
+def _window_min(
+    values: "np.ndarray",
+    present: "np.ndarray",
+    _counts: "np.ndarray",
+    size: int,
+) -> "np.ndarray":
+    return _window_extremes(np.where(present, values, np.inf), size, np.minimum)
+
+
+def _window_max(
+    values: "np.ndarray",
+    present: "np.ndarray",
+    _counts: "np.ndarray",
+    size: int,
+) -> "np.ndarray":
+    return _window_extremes(np.where(present, values, -np.inf), size, np.maximum)
+
+
+def _window_median(
+    values: "np.ndarray",
+    present: "np.ndarray",
+    _counts: "np.ndarray",
+    size: int,
+) -> "np.ndarray":
+    """Return medians of the present values of all full windows.
+
+    Values of the current window are kept sorted, each day inserts its value
+    and removes the one leaving the window by binary search, so the windows
+    are never copied. That's O(log N) comparisons and an O(N) memmove per day.
+    """
+    data = values.tolist()
+    flags = present.tolist()
+    medians = np.full(len(data) - size + 1, np.nan)
+    window: list[float] = []
+
+    for i, value in enumerate(data):
+        if flags[i]:
+            bisect.insort(window, value)
+
+        if i >= size and flags[i - size]:
+            del window[bisect.bisect_left(window, data[i - size])]
+
+        if i >= size - 1 and window:
+            half = len(window) // 2
+            medians[i - size + 1] = (
+                window[half] if len(window) % 2 else (window[half - 1] + window[half]) / 2
+            )
+
+    return medians
+
+
+def _window_extremes(values: "np.ndarray", size: int, ufunc: "np.ufunc") -> "np.ndarray":
+    """Return minimums or maximums of all full windows of size values in O(n).
+
+    Values are split into blocks of size, then every window is covered by a suffix
+    of one block and a prefix of the next one (van Herk/Gil-Werman algorithm).
+    """
+    n_blocks = -(-len(values) // size)
+    padded = np.full(n_blocks * size, values[-1])
+    padded[: len(values)] = values
+    blocks = padded.reshape(n_blocks, size)
+
+    prefixes = ufunc.accumulate(blocks, axis=1).ravel()
+    suffixes = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    starts = np.arange(len(values) - size + 1)
+
+    return ufunc(suffixes[starts], prefixes[starts + size - 1])
+
+
+# Statistics of windows ending on each day from size - 1, given values, present and counts
+_WINDOW_STATISTICS = {
+    "mean": _window_mean,
+    "std": _window_std,
+    "min": _window_min,
+    "max": _window_max,
+    "median": _window_median,
+}
+
+
+def _decay_filter(values: "np.ndarray", decay: float) -> "np.ndarray":
+    """Compute out[t] = decay * out[t - 1] + values[t] in vectorized blocks.
+
+    Within a block, out[t] = decay^t * (carry + cumsum(values[k] / decay^k)),
+    the block length keeps decay^-k from overflowing.
+    """
+    if decay <= 0:
+        return values.astype(np.float64)
+
+    length = max(int(300 / -np.log(decay)), 1)
+    powers = decay ** np.arange(length)
+    out = np.empty(len(values))
+    carry = 0.0
+
+    for start in range(0, len(values), length):
+        chunk = values[start : start + length]
+        scale = powers[: len(chunk)]
+        out[start : start + len(chunk)] = scale * (carry + np.cumsum(chunk / scale))
+        carry = decay * out[start + len(chunk) - 1]
+
+    return out
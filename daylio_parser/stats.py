@@ -1,12 +1,28 @@
 """Mood statistics."""
 
+import bisect
 import datetime
+from collections.abc import Callable, Iterable
+from typing import TypeVar
 
-import numpy as np
 from pydantic import BaseModel
 from pydantic.types import PositiveInt, confloat
 
-from .parser import Entry, MoodConfig
+from .daily import DailySeries
+from .lazy import LazyModule, NDArray
+from .metrics import stage
+from .parser import Entry, EntryTable, MoodConfig
+from .rolling import MIN_VARIANCE, rolling
+
+np = LazyModule("numpy")
+
+T = TypeVar("T")
+
+# Takes an array of moods and returns a boolean array
+MoodPredicate = Callable[["np.ndarray"], "np.ndarray"]
+
+# Largest standard deviation of moods from 1 to 5 (half of them 1, half 5)
+MAX_MOOD_STD = 2
 
 
 class MoodPeriod(BaseModel):
@@ -18,198 +34,750 @@ class MoodPeriod(BaseModel):
     avg_mood: confloat(ge=1.0, le=5.0)
 
 
+class ActivityCooccurrence(BaseModel):
+    """Co-occurrence of activity pairs in entries.
+
+    All matrices are indexed by positions in activities. The diagonal holds
+    values for single activities.
+    """
+
+    activities: list[str]
+    # Number of entries with both activities
+    counts: NDArray
+    # Mean mood of entries with both activities (NaN if there are none)
+    mean_moods: NDArray
+    # Lift of the pair, the ratio of P(both) to P(first) * P(second)
+    lift: NDArray
+
+
+class Resampled(BaseModel):
+    """Mood aggregates of entries per calendar bucket, see Stats.resample.
+
+    All arrays are indexed by buckets, which are sorted by their keys.
+    """
+
+    freq: str
+    # datetime64 bucket starts, ISO year * 100 + week for "isoweek",
+    # 0 (Monday) .. 6 for "weekday" and 0 .. 23 for "hour"
+    keys: NDArray
+    counts: NDArray
+    means: NDArray
+    stds: NDArray
+    mins: NDArray
+    maxs: NDArray
+    # Number of entries with each mood level, shape (buckets, number of levels)
+    histograms: NDArray
+
+
+class Stability(BaseModel):
+    """Stability of daily average moods in windows, see Stats.stability_windows."""
+
+    # First day of the month or last day of the rolling window
+    dates: NDArray
+    # Number of days with entries in the window
+    days: NDArray
+    # Standard deviation of the daily moods
+    variability: NDArray
+    # Mean squared successive difference of the daily moods
+    mssd: NDArray
+    # Fraction of days with the mood within the band
+    within_band: NDArray
+
+
+class RunningStats:
+    """Running count, mean and standard deviation (Welford's algorithm)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float) -> None:
+        """Add one value."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation of the values added so far."""
+        if not self.count:
+            return np.nan
+
+        return np.sqrt(self.m2 / self.count)
+
+
+class StreamingStats:
+    """Reduce a stream of entries incrementally, e.g. from Parser.iter_entries.
+
+    Memory use depends only on the number of distinct days and activities,
+    not on the number of entries. Rolling means are cached per window size
+    and only the days changed since the last call are recomputed.
+    """
+
+    def __init__(self) -> None:
+        self.overall = RunningStats()
+        self.dates: list[datetime.date] = []
+        self.days: dict[datetime.date, RunningStats] = {}
+        self.activities: dict[str, RunningStats] = {}
+
+        # {N: rolling mean for each day in self.dates}
+        self.__rolling: dict[int, list[float]] = {}
+        # {N: number of leading values in self.__rolling[N] that are up to date}
+        self.__rolling_valid: dict[int, int] = {}
+
+    def add(self, entry: Entry) -> None:
+        """Add one entry."""
+        level = entry.mood.level
+        date = entry.datetime.date()
+
+        self.overall.add(level)
+
+        if date not in self.days:
+            self.days[date] = RunningStats()
+            bisect.insort(self.dates, date)
+
+        self.days[date].add(level)
+
+        if self.__rolling_valid:
+            index = bisect.bisect_left(self.dates, date)
+
+            for window, valid in self.__rolling_valid.items():
+                self.__rolling_valid[window] = min(valid, index)
+
+        for activity in entry.activities:
+            self.activities.setdefault(activity, RunningStats()).add(level)
+
+    def consume(self, entries: Iterable[Entry]) -> "StreamingStats":
+        """Add all entries from an iterable, returns self."""
+        for entry in entries:
+            self.add(entry)
+
+        return self
+
+    def average_moods(self) -> list[tuple[datetime.date, float]]:
+        """Average moods for each day, see Stats.average_moods."""
+        return [(date, self.days[date].mean) for date in self.dates]
+
+    def activity_moods(self) -> dict[str, tuple[float, float]]:
+        """Average moods for each activity, see Stats.activity_moods."""
+        return {activity: (acc.mean, acc.std) for activity, acc in self.activities.items()}
+
+    def mean(self) -> tuple[float, float]:
+        """Mean and std from all entries, see Stats.mean."""
+        return self.overall.mean, self.overall.std
+
+    def rolling_mean(self, N: int = 5) -> "np.ndarray":  # noqa: N803
+        """Compute the rolling mean of the average moods, see Stats.rolling_mean."""
+        values = self.__rolling.setdefault(N, [])
+        valid = self.__rolling_valid.get(N, 0)
+        del values[valid:]
+
+        # Days needed to fill the windows of all invalidated values
+        start = max(valid - N + 1, 0)
+        moods = np.array([self.days[date].mean for date in self.dates[start:]])
+
+        values.extend([np.nan] * max(min(N - 1, len(self.dates)) - valid, 0))
+
+        if len(moods) >= N:
+            filtered = np.convolve(moods, np.ones((N,)) / N, mode="valid").round(2)
+            values.extend(filtered.tolist())
+
+        self.__rolling_valid[N] = len(values)
+
+        data = np.empty((len(values), 2), dtype=object)
+        # Assigning a list of dates to an object array is much slower than fromiter
+        data[:, 0] = np.fromiter(self.dates, dtype=object, count=len(self.dates))
+        data[:, 1] = values
+
+        return data
+
+
+def _weekdays(datetimes: "np.ndarray") -> "np.ndarray":
+    """Return weekdays of datetime64 values, Monday is 0."""
+    # 1970-01-01 was a Thursday
+    return (datetimes.astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+
+def _week_keys(datetimes: "np.ndarray") -> "np.ndarray":
+    """Return the Monday of each week."""
+    return datetimes.astype("datetime64[D]") - _weekdays(datetimes)
+
+
+def _isoweek_keys(datetimes: "np.ndarray") -> "np.ndarray":
+    """Return ISO weeks as year * 100 + week."""
+    # ISO week belongs to the year of its Thursday
+    thursdays = _week_keys(datetimes) + 3
+    years = thursdays.astype("datetime64[Y]")
+    weeks = (thursdays - years.astype("datetime64[D]")).astype(np.int64) // 7 + 1
+
+    return (years.astype(np.int64) + 1970) * 100 + weeks
+
+
+def _quarter_keys(datetimes: "np.ndarray") -> "np.ndarray":
+    """Return the first month of each quarter."""
+    months = datetimes.astype("datetime64[M]").astype(np.int64)
+
+    return (months - months % 3).astype("datetime64[M]")
+
+
+_BUCKET_KEYS = {
+    "day": lambda datetimes: datetimes.astype("datetime64[D]"),
+    "week": _week_keys,
+    "isoweek": _isoweek_keys,
+    "month": lambda datetimes: datetimes.astype("datetime64[M]"),
+    "quarter": _quarter_keys,
+    "year": lambda datetimes: datetimes.astype("datetime64[Y]"),
+    "weekday": _weekdays,
+    "hour": lambda datetimes: datetimes.astype("datetime64[h]").astype(np.int64) % 24,
+}
+
+
+def bucket_keys(datetimes: "np.ndarray", freq: str) -> "np.ndarray":
+    """Return calendar bucket keys of datetime64 values, see Resampled.keys."""
+    try:
+        keys = _BUCKET_KEYS[freq]
+    except KeyError:
+        msg = f"Unknown frequency '{freq}'"
+        raise ValueError(msg) from None
+
+    return keys(datetimes)
+
+
+def _stability(variability: float) -> int:
+    """Return percent stability for the standard deviation of moods."""
+    return round(100 * (1 - variability / MAX_MOOD_STD))
+
+
+def find_runs(entering: "np.ndarray", leaving: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    """Find runs of a state that is entered and left by boolean event arrays.
+
+    The state is entered on indexes where entering is True and left on
+    the first following index where leaving is True. Where both are True,
+    entering wins. Returns (starts, ends), where ends are exclusive.
+    """
+    events = np.zeros(len(entering), dtype=np.int8)
+    events[leaving] = -1
+    events[entering] = 1
+
+    # Index of the last event up to each position (-1 before the first one)
+    last_event = np.maximum.accumulate(np.where(events != 0, np.arange(len(events)), -1))
+    state = (last_event >= 0) & (events[last_event] == 1)
+
+    edges = np.diff(state.astype(np.int8), prepend=0, append=0)
+
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
 class Stats:
     """A class to compute stats, interpolate data and so on."""
 
-    def __init__(self, entries: list[Entry], config: MoodConfig = None):
-        """Create the object. If config is None, a default MoodConfig is created."""
+    def __init__(
+        self,
+        entries: list[Entry] | EntryTable,
+        config: MoodConfig = None,
+        *,
+        incremental: bool = False,
+    ) -> None:
+        """Create the object. If config is None, a default MoodConfig is created.
+
+        In incremental mode, running per-day, per-activity and rolling-window
+        accumulators are kept and updated by Stats.append.
+        """
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.__stream = None
+
         self.entries = entries
         self.config = config
 
         if not self.config:
             self.config = MoodConfig()
 
-    def average_moods(self) -> list[tuple[datetime.date, float]]:
-        """Compute average moods for each day.
+        self.__stream = StreamingStats().consume(entries) if incremental else None
+
+    @property
+    def entries(self) -> list[Entry] | EntryTable:
+        """Entries the stats are computed from. Setting them invalidates the cache."""
+        if self.__appended:
+            # Tables added by Stats.append are concatenated once, when they're needed
+            self.__entries = EntryTable.concat([self.__entries, *self.__appended])
+            self.__appended = []
+
+        return self.__entries
+
+    @entries.setter
+    def entries(self, entries: list[Entry] | EntryTable) -> None:
+        self.__entries = entries
+        self.__appended: list[EntryTable] = []
+        self.__size = len(entries)
+        # Lists are copied on the first append, then extended in place
+        self.__owns_list = False
+        self.invalidate()
+
+        if self.__stream:
+            self.__stream = StreamingStats().consume(entries)
+
+    @property
+    def config(self) -> MoodConfig:
+        """Mood config. Setting it invalidates the cache."""
+        return self.__config
+
+    @config.setter
+    def config(self, config: MoodConfig) -> None:
+        self.__config = config
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop all cached series.
+
+        This is done automatically when entries or config are replaced,
+        but has to be called after modifying the entries in place.
+        """
+        # {(method name, *parameters): result}
+        self.__cache = {}
 
-        Returns a list of tuples: [(datetime.date, average mood that day), ...]
+    def append(self, entries: list[Entry] | EntryTable) -> None:
+        """Add new entries.
+
+        In incremental mode, the accumulators are updated in O(new entries),
+        otherwise the stats are recomputed on the next call. New entries
+        of a table are kept aside and concatenated when all entries are needed.
         """
-        group_by_date = {}
+        if isinstance(self.__entries, EntryTable):
+            if not isinstance(entries, EntryTable):
+                entries = EntryTable.from_entries(entries)
 
-        for entry in self.entries:
-            date = datetime.date(entry.datetime.year, entry.datetime.month, entry.datetime.day)
+            self.__appended.append(entries)
+        else:
+            if not self.__owns_list:
+                self.__entries = list(self.__entries)
+                self.__owns_list = True
 
-            group_by_date.setdefault(date, [])
-            group_by_date[date].append(entry.mood.level)
+            self.__entries.extend(entries)
 
-        result = []
+        self.__size += len(entries)
+        self.invalidate()
 
-        for date, moods in group_by_date.items():
-            result.append((date, np.mean(moods)))
+        if self.__stream:
+            self.__stream.consume(entries)
 
-        return result
+    def daily(self) -> DailySeries:
+        """Return average moods and entry counts for every day on a dense calendar.
+
+        The series is computed once and shared, its arrays are read-only.
+        """
+        return self.__cached(
+            ("daily",),
+            lambda: DailySeries.from_table(self.__cached(("table",), self.__table)),
+        )
+
+    def between(
+        self,
+        start: datetime.date | None = None,
+        end: datetime.date | None = None,
+    ) -> "Stats":
+        """Return stats of entries from start to end (both days included).
+
+        Entries have to be sorted by time, oldest first, which is checked once.
+        Each range is then found by binary search, see EntryTable.between.
+        """
+        table = self.__cached(("table",), self.__table)
+
+        if not self.__cached(("sorted",), table.is_sorted):
+            msg = "Entries have to be sorted by time, oldest first"
+            raise ValueError(msg)
+
+        return Stats(table.between(start, end), self.config)
+
+    def average_moods(self) -> list[tuple[datetime.date, float]]:
+        """Compute average moods for each day.
+
+        Returns a list of tuples: [(datetime.date, average mood that day), ...]
+        """
+        if self.__stream:
+            return self.__stream.average_moods()
+
+        return list(self.__cached(("average_moods",), self.__average_moods))
 
     def activity_moods(self) -> dict[str, tuple[float, float]]:
         """Compute average moods for each activity in entries.
 
         Returns a dict: {activity name: (average mood, standard deviation)}
         """
-        activity_to_mood = {}
-
-        for entry in self.entries:
-            for activity in entry.activities:
-                activity_to_mood.setdefault(activity, [])
-                activity_to_mood[activity].append(entry.mood.level)
+        with stage("stats.activity_moods", rows=self.__size):
+            if self.__stream:
+                return self.__stream.activity_moods()
+
+            table = self.__cached(("table",), self.__table)
+            n_activities = len(table.activity_names)
+
+            # Mood level of the entry for each (entry, activity) pair
+            moods = np.repeat(table.levels, np.diff(table.activity_offsets)).astype(np.float64)
+
+            counts = np.bincount(table.activity_ids, minlength=n_activities)
+            sums = np.bincount(table.activity_ids, weights=moods, minlength=n_activities)
+
+            with np.errstate(invalid="ignore"):
+                means = sums / counts
+                deviations = moods - means[table.activity_ids]
+                squares = np.bincount(
+                    table.activity_ids,
+                    weights=deviations**2,
+                    minlength=n_activities,
+                )
+                stds = np.sqrt(squares / counts)
 
-        activities_avg = {}
+            activities_avg = {}
 
-        for activity, moods in activity_to_mood.items():
-            activities_avg[activity] = (np.mean(moods), np.std(moods))
+            for activity_id, activity in enumerate(table.activity_names):
+                if counts[activity_id]:
+                    activities_avg[activity] = (means[activity_id], stds[activity_id])
 
-        return activities_avg
+            return activities_avg
 
-    def mean(self):
-        """Return mean, std from all entries."""
-        mood_levels = [x.mood.level for x in self.entries]
+    def activity_cooccurrence(self) -> ActivityCooccurrence:
+        """Compute counts, mean moods and lift for all pairs of activities.
 
-        return np.mean(mood_levels), np.std(mood_levels)
-
-    def rolling_mean(self, N=5):
-        """Compute rolling mean for the average moods, where N is the window size."""
-        data = np.array(self.average_moods())
-
-        # Compute the rolling mean for our data
-        # Moods are stored in the 1st column, dates in 0th
-        filtered_data = np.convolve(data[:, 1], np.ones((N,)) / N, mode="valid")
-        filtered_data = filtered_data.astype(np.float64).round(2)
-
-        # Fill the missing entries with NaN,
-        # so we can replace the original column
-        # with filtered data
-        nans = np.zeros(N - 1)
-        nans[:] = np.nan
-        filtered_data = np.concatenate((nans, filtered_data))
-        data[:, 1] = filtered_data
+        This is the sparse product of the (entries x activities) incidence
+        matrix with itself: every entry contributes all pairs of its activities.
+        """
+        with stage("stats.activity_cooccurrence", rows=self.__size):
+            table = self.__cached(("table",), self.__table)
+            counts_per_entry = np.diff(table.activity_offsets)
 
-        return data
+            # Keep only activities that occur in the entries
+            used = np.flatnonzero(
+                np.bincount(table.activity_ids, minlength=len(table.activity_names)),
+            )
+            remap = np.full(len(table.activity_names), -1, dtype=np.int64)
+            remap[used] = np.arange(len(used))
+            ids = remap[table.activity_ids]
+            k = len(used)
+
+            # For each activity of an entry, pair it with all activities of the same entry
+            pairs_per_item = np.repeat(counts_per_entry, counts_per_entry)
+            item_offsets = np.repeat(table.activity_offsets[:-1], counts_per_entry)
+            block_starts = np.cumsum(pairs_per_item) - pairs_per_item
+            position = np.arange(pairs_per_item.sum()) - np.repeat(block_starts, pairs_per_item)
+
+            first = np.repeat(ids, pairs_per_item)
+            second = ids[np.repeat(item_offsets, pairs_per_item) + position]
+            pair_moods = np.repeat(np.repeat(table.levels, counts_per_entry), pairs_per_item)
+
+            pair_index = first * k + second
+            counts = np.bincount(pair_index, minlength=k * k).reshape(k, k)
+            sums = np.bincount(pair_index, weights=pair_moods, minlength=k * k).reshape(k, k)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean_moods = sums / counts
+                probabilities = counts / len(table)
+                single = np.diag(probabilities)
+                lift = probabilities / np.outer(single, single)
+
+            return ActivityCooccurrence(
+                activities=[table.activity_names[i] for i in used],
+                counts=counts,
+                mean_moods=mean_moods,
+                lift=lift,
+            )
 
-    def find_high_periods(self, threshold: float = 4, min_duration: int = 4) -> list[MoodPeriod]:
-        """Find periods of elevated mood (hypomania, mania).
+    def resample(self, freq: str = "month") -> Resampled:
+        """Compute mood aggregates for each calendar bucket of entries.
 
-        TODO: The threshold is highly individual
+        freq is one of "day", "week" (starting on Monday), "isoweek", "month",
+        "quarter", "year", "weekday" and "hour" (of day). All aggregates are
+        derived from the per-bucket histograms of mood levels.
         """
-        start_date = None
-        dates = []
-        moods = []
+        with stage("stats.resample", rows=self.__size):
+            table = self.__cached(("table",), self.__table)
+            keys, bucket_index = np.unique(bucket_keys(table.datetimes, freq), return_inverse=True)
+            levels = np.arange(1, 6)
+
+            histograms = np.bincount(
+                bucket_index * len(levels) + table.levels - 1,
+                minlength=len(keys) * len(levels),
+            ).reshape(len(keys), len(levels))
+
+            counts = histograms.sum(axis=1)
+            means = histograms @ levels / counts
+            stds = np.sqrt((histograms * (levels - means[:, None]) ** 2).sum(axis=1) / counts)
+            present = histograms > 0
+
+            return Resampled(
+                freq=freq,
+                keys=keys,
+                counts=counts,
+                means=means,
+                stds=stds,
+                mins=levels[present.argmax(axis=1)],
+                maxs=levels[len(levels) - 1 - present[:, ::-1].argmax(axis=1)],
+                histograms=histograms,
+            )
 
-        for date, mood in self.rolling_mean():
-            if not start_date and mood > threshold:
-                start_date = date
-                moods = []
+    def mean(self):
+        """Return mean, std from all entries."""
+        if self.__stream:
+            return self.__stream.mean()
 
-            moods.append(mood)
+        mood_levels = self.__cached(("table",), self.__table).levels
 
-            if start_date and mood <= threshold:
-                end_date = date
-                period = MoodPeriod(
-                    start=start_date,
-                    end=end_date,
-                    duration=(end_date - start_date).days,
-                    avg_mood=np.mean(moods),
-                )
+        return np.mean(mood_levels), np.std(mood_levels)
 
-                if period.duration >= min_duration:
-                    dates.append(period)
+    def rolling_mean(self, N=5):
+        """Compute rolling mean for the average moods, where N is the window size."""
+        if self.__stream:
+            return self.__stream.rolling_mean(N)
 
-                start_date = None
-                end_date = None
-                moods = []
-        if start_date:
-            end_date = date
+        return self.__cached(("rolling_mean", N), lambda: self.__rolling_mean(N)).copy()
 
-            period = MoodPeriod(
-                start=start_date,
-                end=end_date,
-                duration=(end_date - start_date).days,
-                avg_mood=np.mean(moods),
-            )
+    def rolling(
+        self,
+        N: int = 5,  # noqa: N803 (same as rolling_mean)
+        stat: str = "mean",
+        gaps: str = "nan",
+    ) -> tuple["np.ndarray", "np.ndarray"]:
+        """Compute a rolling statistic of average moods on a dense calendar.
 
-            if period.duration >= min_duration:
-                dates.append(period)
+        Windows are N calendar days long, days without entries are handled
+        as given by gaps (see the rolling module). stat is one of "mean",
+        "std", "min", "max", "median" and "ewma".
 
-        return dates
+        Returns (datetime64[D] array of all days, float64 array of values).
+        """
+        daily = self.daily()
+        values = self.__cached(
+            ("rolling", N, stat, gaps),
+            lambda: rolling(daily.means, N, stat, gaps),
+        )
+
+        return daily.dates.copy(), values.copy()
+
+    def find_periods(  # noqa: PLR0913 (predicates and options of the rolling mean)
+        self,
+        enter: MoodPredicate,
+        leave: MoodPredicate | None = None,
+        min_duration: int = 1,
+        N: int = 5,  # noqa: N803
+        gaps: str | None = None,
+    ) -> list[MoodPeriod]:
+        """Find periods in the rolling mean (window size N) given by predicates.
+
+        Both enter and leave take an array of moods and return a boolean array.
+        A period starts on a day where enter is True and ends on the first
+        following day where leave is True (by default where enter is False).
+        The end day is included in the period. Days without a rolling mean
+        (NaN) neither start nor end a period.
+
+        If gaps is None, the rolling mean is taken over days with entries,
+        otherwise over calendar days with the given gap handling (see Stats.rolling).
+
+        Returns periods that are at least min_duration days long.
+        """
+        with stage("stats.find_periods", rows=self.__size):
+            if gaps is None:
+                data = self.rolling_mean(N)
+                dates = np.array(data[:, 0], dtype="datetime64[D]")
+                moods = data[:, 1].astype(np.float64)
+            else:
+                dates, moods = self.rolling(N, "mean", gaps)
+
+            valid = ~np.isnan(moods)
+
+            with np.errstate(invalid="ignore"):
+                entering = enter(moods) & valid
+                leaving = (~entering if leave is None else leave(moods)) & valid
+
+            starts, ends = find_runs(entering, leaving)
+
+            # The period ends on the first day that leaves it or on the last day
+            ends = np.minimum(ends, len(moods) - 1)
+            durations = (dates[ends] - dates[starts]).astype(np.int64)
+            keep = durations >= max(min_duration, 1)
+            starts, ends, durations = starts[keep], ends[keep], durations[keep]
+
+            # Segment means from cumulative sums
+            sums = np.concatenate(([0], np.cumsum(np.where(valid, moods, 0))))
+            counts = np.concatenate(([0], np.cumsum(valid)))
+            means = (sums[ends + 1] - sums[starts]) / (counts[ends + 1] - counts[starts])
+
+            return [
+                MoodPeriod(
+                    start=dates[start].item(),
+                    end=dates[end].item(),
+                    duration=duration,
+                    avg_mood=mean,
+                )
+                for start, end, duration, mean in zip(
+                    starts.tolist(),
+                    ends.tolist(),
+                    durations.tolist(),
+                    means.tolist(),
+                    strict=True,
+                )
+            ]
+
+    def find_high_periods(
+        self,
+        threshold: float = 4,
+        min_duration: int = 4,
+        hysteresis: float = 0,
+        gaps: str | None = None,
+    ) -> list[MoodPeriod]:
+        """Find periods of elevated mood (hypomania, mania).
 
-    def find_low_periods(self, threshold: float = 3, min_duration: int = 5) -> list[MoodPeriod]:
-        """Find periods of low mood (depression).
+        A period starts above the threshold and ends at or below threshold - hysteresis.
+        See Stats.find_periods for gaps.
 
         TODO: The threshold is highly individual
         """
-        start_date = None
-        dates = []
-        moods = []
-
-        for date, mood in self.rolling_mean():
-            if not start_date and mood < threshold:
-                start_date = date
-                moods = []
+        return self.find_periods(
+            lambda moods: moods > threshold,
+            lambda moods: moods <= threshold - hysteresis,
+            min_duration,
+            gaps=gaps,
+        )
+
+    def find_low_periods(
+        self,
+        threshold: float = 3,
+        min_duration: int = 5,
+        hysteresis: float = 0,
+        gaps: str | None = None,
+    ) -> list[MoodPeriod]:
+        """Find periods of low mood (depression).
 
-            moods.append(mood)
+        A period starts below the threshold and ends at or above threshold + hysteresis.
+        See Stats.find_periods for gaps.
 
-            if start_date and mood >= threshold:
-                end_date = date
+        TODO: The threshold is highly individual
+        """
+        return self.find_periods(
+            lambda moods: moods < threshold,
+            lambda moods: moods >= threshold + hysteresis,
+            min_duration,
+            gaps=gaps,
+        )
 
-                period = MoodPeriod(
-                    start=start_date,
-                    end=end_date,
-                    duration=(end_date - start_date).days,
-                    avg_mood=np.mean(moods),
-                )
+    def stability(self, mood_levels: list[float]) -> int:
+        """Return percent stability for given list of mood levels.
 
-                if period.duration >= min_duration:
-                    dates.append(period)
+        This is 100 % minus the standard deviation of the levels relative
+        to the largest possible one (MAX_MOOD_STD), the same as variability
+        in Stats.stability_windows.
+        """
+        return _stability(np.std(np.asarray(mood_levels, dtype=np.float64)))
 
-                start_date = None
-                end_date = None
-                moods = []
-        if start_date:
-            end_date = date
+    def stability_by_month(self) -> list[tuple[datetime.date, int]]:
+        """Compute stability of daily average moods for each month.
 
-            period = MoodPeriod(
-                start=start_date,
-                end=end_date,
-                duration=(end_date - start_date).days,
-                avg_mood=np.mean(moods),
+        This is the variability of Stats.stability_windows("month") as a percentage,
+        see Stats.stability.
+        """
+        windows = self.stability_windows("month")
+
+        return list(
+            zip(
+                windows.dates.tolist(),
+                [_stability(variability) for variability in windows.variability.tolist()],
+                strict=True,
+            ),
+        )
+
+    def stability_windows(
+        self,
+        window: str | int = "month",
+        band: tuple[float, float] = (3, 4),
+    ) -> Stability:
+        """Compute stability metrics of daily average moods in windows.
+
+        window is either "month" or a number of calendar days N for rolling
+        windows ending on each day with entries. Successive differences are
+        taken between successive days with entries. Days with the mood within
+        the band (inclusive) are counted in Stability.within_band.
+        """
+        with stage("stats.stability_windows", rows=self.__size):
+            daily = self.daily()
+            dates = daily.dates[~daily.gaps]
+            moods = daily.means[~daily.gaps]
+
+            if window == "month":
+                keys, starts = np.unique(dates.astype("datetime64[M]"), return_index=True)
+                ends = np.append(starts[1:], len(dates))
+                window_dates = keys.astype("datetime64[D]")
+            elif isinstance(window, int) and window > 0:
+                ends = np.arange(1, len(dates) + 1)
+                starts = np.searchsorted(dates, dates - (window - 1))
+                window_dates = dates
+            else:
+                msg = f"Unknown window '{window}'"
+                raise ValueError(msg)
+
+            # Windows [start, end) are summed from prefix sums, centered for precision
+            centered = moods - (moods.mean() if len(moods) else 0)
+            sums = np.concatenate(([0], np.cumsum(centered)))
+            squares = np.concatenate(([0], np.cumsum(centered**2)))
+            differences = np.concatenate(([0, 0], np.cumsum(np.diff(moods) ** 2)))
+            lower, upper = band
+            in_band = np.concatenate(([0], np.cumsum((moods >= lower) & (moods <= upper))))
+
+            days = ends - starts
+            # Successive differences inside the window are those from start + 1 to end - 1
+            n_differences = np.maximum(days - 1, 0)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = (sums[ends] - sums[starts]) / days
+                variances = (squares[ends] - squares[starts]) / days - means**2
+                mssd = (
+                    differences[ends] - differences[np.minimum(starts + 1, ends)]
+                ) / n_differences
+
+            return Stability(
+                dates=window_dates,
+                days=days,
+                variability=np.sqrt(np.where(variances > MIN_VARIANCE, variances, 0)),
+                mssd=mssd,
+                within_band=(in_band[ends] - in_band[starts]) / days,
             )
 
-            if period.duration >= min_duration:
-                dates.append(period)
-
-        return dates
+    def __cached(self, key: tuple, compute: Callable[[], T]) -> T:
+        """Return a cached result for key, computing it on a miss."""
+        try:
+            result = self.__cache[key]
+        except KeyError:
+            self.cache_misses += 1
 
-    def stability(self, mood_levels: list[float]) -> int:
-        """Return percent stability for given list of mood levels."""
-        raise NotImplementedError("Mood stability is not yet implemented.")
+            with stage(f"stats.{key[0]}", rows=self.__size):
+                result = self.__cache[key] = compute()
+        else:
+            self.cache_hits += 1
 
-        if np.std(mood_levels) == 0:
-            return 100
+        return result
 
-        return 0
+    def __average_moods(self) -> list[tuple[datetime.date, float]]:
+        return self.daily().average_moods()
 
-    def stability_by_month(self) -> list[tuple[datetime.date, int]]:
-        """Compute mood stability for each year-month in given entries."""
-        raise NotImplementedError("Mood stability is not yet implemented.")
+    def __rolling_mean(self, n: int) -> "np.ndarray":
+        avg_moods = self.average_moods()
+        moods = np.array([mood for _, mood in avg_moods], dtype=np.float64)
 
-        group_by_date = {}
+        # Days without a full window are NaN
+        filtered_data = np.full(len(moods), np.nan)
 
-        for entry in self.entries:
-            date = datetime.date(entry.datetime.year, entry.datetime.month, 1)
+        if len(moods) >= n:
+            filtered_data[n - 1 :] = np.convolve(moods, np.ones((n,)) / n, mode="valid").round(2)
 
-            group_by_date.setdefault(date, [])
-            group_by_date[date].append(entry.mood.level)
+        # Dates are stored in the 0th column, moods in the 1st
+        data = np.empty((len(avg_moods), 2), dtype=object)
+        data[:, 0] = np.fromiter((date for date, _ in avg_moods), dtype=object, count=len(data))
+        data[:, 1] = filtered_data
 
-        result = []
+        return data
 
-        for date, moods in group_by_date.items():
-            result.append((date, self.stability(moods)))
+    def __table(self) -> EntryTable:
+        """Return the entries as an EntryTable, converting a list of entries if needed."""
+        if isinstance(self.entries, EntryTable):
+            return self.entries
 
-        return result
+        return EntryTable.from_entries(self.entries)
@@ -0,0 +1,98 @@
+"""Decoding of dates and times from Daylio exports."""
+
+import datetime
+
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+HOURS = 24
+MINUTES = 60
+
+
+class TimestampDecoder:
+    """Decode ``full_date`` and ``time`` columns of the export.
+
+    Exports contain only a few thousand distinct dates and at most 2880
+    distinct times (both 12h and 24h formats), so every distinct string
+    is parsed once and then looked up in a cache.
+    """
+
+    def __init__(self) -> None:
+        # full_date -> (year, month, day, days since epoch)
+        self.__dates: dict[str, tuple[int, int, int, int]] = {}
+        # time -> (hour, minute)
+        self.__times: dict[str, tuple[int, int]] = {}
+
+    def decode(self, date: str, time: str) -> datetime.datetime:
+        """Return the datetime for one row."""
+        year, month, day, _ = self.__date(date)
+        hour, minute = self.__time(time)
+
+        # Exports are in local time without a timezone
+        return datetime.datetime(year, month, day, hour, minute)  # noqa: DTZ001
+
+    def decode_many(self, dates: list[str], times: list[str]) -> "np.ndarray":
+        """Return a datetime64[m] array for whole columns of dates and times."""
+        days = np.fromiter(
+            (self.__date(date)[3] for date in dates),
+            dtype=np.int64,
+            count=len(dates),
+        )
+        minutes = np.fromiter(
+            (hour * MINUTES + minute for hour, minute in map(self.__time, times)),
+            dtype=np.int64,
+            count=len(times),
+        )
+
+        return (days * HOURS * MINUTES + minutes).astype("datetime64[m]")
+
+    def __date(self, date: str) -> tuple[int, int, int, int]:
+        try:
+            return self.__dates[date]
+        except KeyError:
+            d = datetime.date.fromisoformat(date)
+            decoded = self.__dates[date] = (d.year, d.month, d.day, d.toordinal() - EPOCH_ORDINAL)
+
+            return decoded
+
+    def __time(self, time: str) -> tuple[int, int]:
+        try:
+            return self.__times[time]
+        except KeyError:
+            decoded = self.__times[time] = parse_time(time)
+
+            return decoded
+
+
+def parse_time(time: str) -> tuple[int, int]:
+    """Parse a time in either 12h (``6:50 pm``) or 24h (``18:50``) format.
+
+    Returns (hour, minute).
+    """
+    hour_part, _, rest = time.strip().partition(":")
+    # Any whitespace can precede the period, newer Android versions use U+202F
+    minute_part, *period = rest.split(None, 1) or [""]
+
+    unknown_format = f"Time '{time}' is not in a known format"
+
+    try:
+        hour = int(hour_part)
+        minute = int(minute_part)
+    except ValueError:
+        raise ValueError(unknown_format) from None
+
+    period = "".join(period).lower()
+
+    if period:
+        if period not in ("am", "pm") or not 1 <= hour <= HOURS // 2:
+            raise ValueError(unknown_format)
+
+        hour = hour % (HOURS // 2) + (HOURS // 2 if period == "pm" else 0)
+
+    if not (0 <= hour < HOURS and 0 <= minute < MINUTES):
+        msg = f"Time '{time}' is out of range"
+        raise ValueError(msg)
+
+    return hour, minute
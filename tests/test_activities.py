@@ -0,0 +1,27 @@
+"""Test activities.py."""
+
+from daylio_parser.activities import ActivityVocabulary
+
+
+def test_vocabulary():
+    vocabulary = ActivityVocabulary()
+
+    assert vocabulary.parse("work | good meal") == (0, 1)
+    assert vocabulary.parse("") == ()
+    assert vocabulary.parse("good meal | nap") == (1, 2)
+    assert vocabulary.encode(["nap", "work", "gaming"]) == (2, 0, 3)
+
+    assert len(vocabulary) == 4
+    assert "nap" in vocabulary
+    assert "walk" not in vocabulary
+    assert vocabulary.decode((3, 0)) == ["gaming", "work"]
+
+
+def test_interned_names():
+    """Test that every activity name is stored once."""
+    vocabulary = ActivityVocabulary()
+    first = vocabulary.decode(vocabulary.parse("work | nap"))
+    second = vocabulary.decode(vocabulary.parse("nap | work"))
+
+    assert first[0] is second[1]
+    assert first[1] is second[0]
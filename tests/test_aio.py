@@ -0,0 +1,123 @@
+"""Test aio.py."""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from daylio_parser.aio import AsyncParser, AsyncRunner, AsyncStats, read_text
+from daylio_parser.parser import Parser
+from daylio_parser.stats import Stats
+
+
+def test_load_csv(test_csv, entries):
+    """Test that AsyncParser loads the same entries as Parser."""
+    assert asyncio.run(AsyncParser().load_csv(test_csv)) == entries
+
+
+def test_load_table_process_pool(test_csv):
+    """Test loading a table with parsing in a process pool."""
+
+    async def load():
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as pool:
+            return await AsyncParser(runner=AsyncRunner(pool)).load_table(test_csv)
+
+    table = asyncio.run(load())
+    expected = Parser().load_table(test_csv)
+
+    assert table.to_entries() == expected.to_entries()
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_shared_activities(tmp_path, executor):
+    """Test that activity IDs of tables loaded by one AsyncParser match."""
+    header = "full_date,date,weekday,time,mood,activities,note_title,note\n"
+    first = tmp_path / "first.csv"
+    first.write_text(header + "2020-05-30,30 May,Saturday,6:50 pm,good,work | gym,,\n")
+    second = tmp_path / "second.csv"
+    second.write_text(header + "2020-05-31,31 May,Sunday,6:50 pm,good,reading | gym,,\n")
+
+    async def load():
+        pool_type = {
+            "process": concurrent.futures.ProcessPoolExecutor,
+            "thread": concurrent.futures.ThreadPoolExecutor,
+        }[executor]
+
+        with pool_type(max_workers=2) as pool:
+            parser = AsyncParser(runner=AsyncRunner(pool))
+            tables = [await parser.load_table(first), await parser.load_table(second)]
+
+            return parser, tables
+
+    parser, (first_table, second_table) = asyncio.run(load())
+
+    assert first_table.activity_ids.tolist() == [0, 1]
+    assert second_table.activity_ids.tolist() == [2, 1]
+    assert parser.parser.activities.names == ["work", "gym", "reading"]
+    assert second_table.activities(0) == ["reading", "gym"]
+
+
+def test_stats(entries):
+    """Test that AsyncStats gives the same results as Stats."""
+    stats = Stats(entries)
+
+    async def compute():
+        async_stats = AsyncStats(stats)
+        return await asyncio.gather(
+            async_stats.average_moods(),
+            async_stats.activity_moods(),
+            async_stats.find_high_periods(threshold=4, min_duration=4),
+        )
+
+    avg_moods, activity_moods, high_periods = asyncio.run(compute())
+
+    assert avg_moods == stats.average_moods()
+    assert activity_moods == stats.activity_moods()
+    assert high_periods == stats.find_high_periods(threshold=4, min_duration=4)
+    assert np.array_equal(asyncio.run(AsyncStats(stats).mean()), stats.mean())
+
+
+def test_max_jobs():
+    """Test that the runner doesn't run more than max_jobs at once."""
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def job():
+        with lock:
+            running.append(None)
+            peak.append(len(running))
+
+        time.sleep(0.01)
+
+        with lock:
+            running.pop()
+
+    async def run_all():
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            runner = AsyncRunner(pool, max_jobs=2)
+            await asyncio.gather(*(runner.run(job) for _ in range(10)))
+
+    asyncio.run(run_all())
+
+    assert len(peak) == 10
+    assert max(peak) <= 2
+
+
+def test_read_text_cancel(test_csv):
+    """Test chunked reading and that it can be cancelled."""
+    text = asyncio.run(read_text(test_csv, chunk_size=16))
+
+    assert text == test_csv.read_text()
+
+    async def cancel():
+        task = asyncio.create_task(read_text(test_csv, chunk_size=1))
+        await asyncio.sleep(0)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel())
@@ -0,0 +1,67 @@
+"""Test batch.py."""
+
+import numpy as np
+import pytest
+
+from daylio_parser.batch import analyze
+from daylio_parser.config import MoodConfig
+from daylio_parser.stats import Stats
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_analyze(test_csv, entries, tmp_path, executor):
+    """Test that results are consolidated per user and failures are isolated."""
+    broken = tmp_path / "broken.csv"
+    broken.write_text(
+        "full_date,date,weekday,time,mood,activities,note_title,note\n"
+        "2020-05-30,30 May,Saturday,6:50 pm,unknown,,,\n",
+    )
+
+    result = analyze(
+        {"first": test_csv, "broken": broken, "second": test_csv},
+        workers=2,
+        executor=executor,
+    )
+    stats = Stats(entries)
+    avg_moods = stats.average_moods()
+
+    assert result.users == ["first", "broken", "second"]
+    assert list(result.errors) == ["broken"]
+    assert "MoodNotFoundError" in result.errors["broken"]
+
+    for user in (0, 2):
+        daily = result.daily["user"] == user
+
+        assert list(result.daily["date"][daily]) == [np.datetime64(date) for date, _ in avg_moods]
+        assert list(result.daily["mood"][daily]) == [mood for _, mood in avg_moods]
+
+        activities = result.activities["user"] == user
+
+        assert set(result.activities["activity"][activities]) == set(stats.activity_moods())
+
+    assert len(result.periods["user"]) == 0
+
+
+def test_analyze_config_map(test_csv, tmp_path):
+    """Test that every user can have their own config."""
+    moods = [(1, "awful"), (2, "bad"), (3, "meh"), (4, "good"), (5, "great")]
+    custom = tmp_path / "custom.csv"
+    custom.write_text(test_csv.read_text().replace(",rad,", ",great,"))
+
+    result = analyze([custom], {str(custom): MoodConfig(moods)}, executor="thread")
+
+    assert result.errors == {}
+    assert result.daily["mood"][-1] == 5
+
+
+def test_analyze_all_failed(tmp_path):
+    result = analyze([tmp_path / "missing.csv"], executor="thread")
+
+    assert list(result.errors) == [str(tmp_path / "missing.csv")]
+    assert result.daily["mood"].dtype == np.float64
+    assert len(result.daily["mood"]) == 0
+
+
+def test_analyze_executor(test_csv):
+    with pytest.raises(ValueError, match="Unknown executor"):
+        analyze([test_csv], executor="fork")
@@ -0,0 +1,29 @@
+"""Test the synthetic export generator of benchmarks."""
+
+import io
+
+from benchmarks.generator import generate_export
+from daylio_parser.config import MoodConfig
+from daylio_parser.parser import Parser
+
+
+def test_generate_export():
+    """Test that generated exports are deterministic and parse."""
+    moods = [(1, "awful"), (2, "bad"), (3, "meh"), (3, "ok"), (4, "good"), (5, "rad")]
+    first = io.StringIO()
+    second = io.StringIO()
+
+    rows = generate_export(first, years=1, entries_per_day=3, time_format="24h", moods=moods)
+    generate_export(second, years=1, entries_per_day=3, time_format="24h", moods=moods)
+
+    assert rows == 365 * 3
+    assert first.getvalue() == second.getvalue()
+
+    first.seek(0)
+    table = Parser(MoodConfig(moods)).load_table_from_buffer(first)
+
+    assert len(table) == rows
+    assert table.is_sorted()
+    assert len(set(table.datetimes.astype("datetime64[D]").tolist())) == 365
+    assert {mood.name for mood in table.moods} <= {name for _, name in moods}
+    assert any("\n" in table.note(i) for i in range(rows))
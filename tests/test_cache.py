@@ -0,0 +1,132 @@
+"""Test cache.py."""
+
+import shutil
+
+import numpy as np
+import pytest
+
+from daylio_parser.cache import cache_path, fingerprint
+from daylio_parser.config import MoodConfig
+from daylio_parser.parser import EntryTable, Parser
+from daylio_parser.stats import Stats
+
+
+@pytest.fixture()
+def csv_copy(test_csv, tmp_path):
+    """Copy of the test CSV in a temporary directory."""
+    path = tmp_path / "export.csv"
+    shutil.copy(test_csv, path)
+
+    return path
+
+
+def test_cache_roundtrip(csv_copy, entries):
+    """Test that the second load is served from the cache."""
+    parser = Parser()
+
+    assert parser.load_csv(csv_copy, cache=True) == entries
+    assert cache_path(csv_copy).exists()
+
+    def fail(_f):
+        msg = "The CSV should not be parsed"
+        raise AssertionError(msg)
+
+    parser.load_table_from_buffer = fail
+
+    assert parser.load_csv(csv_copy, cache=True) == entries
+    assert parser.load_table(csv_copy, cache=True).to_entries() == entries
+
+
+def test_cache_invalidation(csv_copy):
+    """Test that changes to the CSV or the config give a new key."""
+    config = MoodConfig()
+    key = fingerprint(csv_copy, config)
+
+    assert fingerprint(csv_copy, MoodConfig()) == key
+    assert fingerprint(csv_copy, MoodConfig(color_palette=["black"] * 5)) != key
+
+    parser = Parser(config)
+    parser.load_table(csv_copy, cache=True)
+
+    with csv_copy.open() as fread:
+        header, _, *rows = fread.readlines()
+
+    with csv_copy.open("w") as fwrite:
+        fwrite.write(header + "".join(rows))
+
+    assert fingerprint(csv_copy, config) != key
+    assert EntryTable.load(cache_path(csv_copy), config, fingerprint(csv_copy, config)) is None
+    assert len(parser.load_table(csv_copy, cache=True)) == len(rows)
+
+
+def test_cache_dir(csv_copy, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+
+    Parser().load_table(csv_copy, cache=True, cache_dir=cache_dir)
+
+    assert cache_path(csv_copy, cache_dir).parent == cache_dir
+    assert cache_path(csv_copy, cache_dir).exists()
+    assert not cache_path(csv_copy).exists()
+
+    # Exports with the same name in different directories
+    other = tmp_path / "other" / csv_copy.name
+    other.parent.mkdir()
+    shutil.copy(csv_copy, other)
+
+    assert cache_path(other, cache_dir) != cache_path(csv_copy, cache_dir)
+    assert cache_path(other, cache_dir).name.startswith(f".{csv_copy.name}.")
+
+
+def test_memory_mapped_table(csv_copy, entries, tmp_path):
+    """Test that saved tables are memory-mapped and usable by Stats."""
+    table = Parser().load_table(csv_copy)
+    table.save(tmp_path / "table")
+
+    mapped = EntryTable.load(tmp_path / "table", MoodConfig())
+
+    assert isinstance(mapped.datetimes, np.memmap)
+    assert isinstance(mapped.levels, np.memmap)
+    assert mapped.to_entries() == entries
+    assert Stats(mapped).average_moods() == Stats(entries).average_moods()
+    assert Stats(mapped).activity_moods() == Stats(table).activity_moods()
+
+    copied = EntryTable.load(tmp_path / "table", MoodConfig(), mmap=False)
+
+    assert not isinstance(copied.datetimes, np.memmap)
+    assert copied.to_entries() == entries
+
+
+def test_broken_cache(csv_copy, entries):
+    """Test that an unreadable cache is replaced."""
+    path = cache_path(csv_copy)
+    path.mkdir()
+
+    assert Parser().load_csv(csv_copy, cache=True) == entries
+    assert (path / "meta.json").exists()
+
+
+def test_save_replaces_table(csv_copy, tmp_path):
+    """Test that saving over a table leaves no temporary directories."""
+    table = Parser().load_table(csv_copy)
+    cache_dir = tmp_path / "cache"
+
+    table.save(cache_dir / "table", "first")
+    table.save(cache_dir / "table", "second")
+
+    assert [path.name for path in cache_dir.iterdir()] == ["table"]
+    assert EntryTable.load(cache_dir / "table", MoodConfig(), "second").to_entries() == (
+        table.to_entries()
+    )
+
+
+def test_failed_cache_write(csv_copy, entries, monkeypatch):
+    """Test that a failed cache write doesn't fail the load."""
+
+    def fail(_self, path, _key=""):
+        raise FileExistsError(path)
+
+    monkeypatch.setattr(EntryTable, "save", fail)
+
+    assert Parser().load_csv(csv_copy, cache=True) == entries
+    assert not cache_path(csv_copy).exists()
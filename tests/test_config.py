@@ -1,5 +1,6 @@
 """Test config.py"""
 
+import numpy as np
 import pytest
 
 from daylio_parser.config import (
@@ -124,6 +125,33 @@ def test_get_mood_missing():
         m.get("this does not exist")
 
 
+def test_lookup_tables():
+    """Test lookup tables of a config with two moods on one level."""
+    moods = [*DEFAULT_MOODS, (4, "fine")]
+    m = MoodConfig(moods)
+
+    codes = m.codes(["rad", "fine", "awful", "fine"])
+
+    assert codes.tolist() == [4, 5, 0, 5]
+    assert m.mood_names[codes].tolist() == ["rad", "fine", "awful", "fine"]
+    assert m.mood_levels[codes].tolist() == [5, 4, 1, 4]
+    assert m.level_boundaries[m.mood_levels[codes]].tolist() == [
+        [4.5, 5.01],
+        [3.5, 4.5],
+        [1, 1.5],
+        [3.5, 4.5],
+    ]
+    assert m.level_colors[4] == DEFAULT_COLOR_PALETTE[3]
+    assert np.isnan(m.level_boundaries[0]).all()
+
+    with pytest.raises(MoodNotFoundError, match="Mood 'great' is not configured"):
+        m.codes(["rad", "great"])
+
+    m.from_list(DEFAULT_MOODS, ["black", "red", "orange", "yellow", "green"])
+    assert m.level_colors[1:].tolist() == ["black", "red", "orange", "yellow", "green"]
+    assert len(m.mood_levels) == 5
+
+
 def test_validation():
     """Test wrong mood lists."""
     # Only 1 mood
@@ -0,0 +1,61 @@
+"""Test daily.py."""
+
+import datetime
+
+import numpy as np
+import pytest
+
+from daylio_parser.daily import DailySeries
+from daylio_parser.parser import EntryTable
+from daylio_parser.stats import Stats
+
+
+@pytest.fixture()
+def series(entries):
+    """Daily series of the test data, there are no entries on 2020-05-26."""
+    return DailySeries.from_table(EntryTable.from_entries(entries))
+
+
+def test_from_table(series, entries):
+    """Test the dense calendar, gaps and runs."""
+    assert series.dates.dtype == np.dtype("datetime64[D]")
+    assert series.dates[0] == np.datetime64("2020-05-25")
+    assert len(series) == 6
+    assert series.counts.tolist() == [6, 0, 10, 5, 7, 4]
+    assert series.gaps.tolist() == [False, True, False, False, False, False]
+    assert series.runs.tolist() == [[0, 1], [2, 6]]
+    assert np.isnan(series.means[1])
+    assert series.average_moods() == Stats(entries).average_moods()
+
+
+def test_slice(series):
+    """Test slicing by dates (both included)."""
+    part = series.slice(datetime.date(2020, 5, 26), datetime.date(2020, 5, 28))
+
+    assert part.dates.tolist() == [
+        datetime.date(2020, 5, 26),
+        datetime.date(2020, 5, 27),
+        datetime.date(2020, 5, 28),
+    ]
+    assert part.counts.tolist() == [0, 10, 5]
+    assert part.runs.tolist() == [[1, 3]]
+    assert np.shares_memory(part.means, series.means)
+
+    assert series.slice(end=datetime.date(2020, 5, 27)).runs.tolist() == [[0, 1], [2, 3]]
+    assert len(series.slice(datetime.date(2021, 1, 1))) == 0
+    assert len(series.slice(datetime.date(2020, 5, 29), datetime.date(2020, 5, 1))) == 0
+
+
+def test_read_only(series):
+    """Test that the shared arrays can't be modified."""
+    with pytest.raises(ValueError, match="read-only"):
+        series.means[0] = 0
+
+
+def test_empty():
+    """Test a series without entries."""
+    series = Stats([]).daily()
+
+    assert len(series) == 0
+    assert series.runs.shape == (0, 2)
+    assert series.average_moods() == []
@@ -0,0 +1,70 @@
+"""Test lazy.py and import times of the package."""
+
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from daylio_parser.lazy import LazyModule
+from daylio_parser.stats import Stability
+
+# Seconds, about 3x the import time measured on a laptop (about 200 ms each,
+# which is mostly pydantic), numpy alone takes over 100 ms more. The package
+# itself takes under 1 ms, its budget catches any eager import in __init__.
+IMPORT_BUDGETS = {
+    "import daylio_parser": 0.02,
+    "from daylio_parser.parser import Parser": 0.6,
+    "from daylio_parser.stats import Stats": 0.7,
+    "from daylio_parser.plot import PlotData": 0.7,
+    "from daylio_parser.batch import analyze": 0.7,
+    "from daylio_parser.aio import AsyncParser, AsyncStats": 0.7,
+}
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start, "numpy" in sys.modules)
+"""
+
+
+def test_lazy_module():
+    """Test that the module is imported on the first attribute access."""
+    json = LazyModule("json")
+
+    assert "loads" not in vars(json)
+    assert json.loads("[1]") == [1]
+    assert "loads" in vars(json)
+
+    with pytest.raises(AttributeError):
+        _ = json.does_not_exist
+
+
+def test_array_fields():
+    """Test that array fields of result models only accept NumPy arrays."""
+    dates = np.arange(3)
+
+    assert Stability(dates=dates, days=dates, variability=dates, mssd=dates, within_band=dates)
+
+    with pytest.raises(ValueError, match="Expected a NumPy array, got list"):
+        Stability(dates=[0], days=dates, variability=dates, mssd=dates, within_band=dates)
+
+
+@pytest.mark.parametrize("statement", IMPORT_BUDGETS)
+def test_import_budget(statement):
+    """Test that the modules are imported without numpy and within the budget."""
+    times = []
+
+    for _ in range(3):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT.format(statement=statement)],  # noqa: S603
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.split()
+
+        assert output[1] == "False"
+        times.append(float(output[0]))
+
+    assert min(times) < IMPORT_BUDGETS[statement]
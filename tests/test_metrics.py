@@ -0,0 +1,94 @@
+"""Test metrics.py."""
+
+import asyncio
+
+from daylio_parser import metrics
+from daylio_parser.aio import AsyncParser, AsyncStats
+from daylio_parser.parser import Parser
+from daylio_parser.plot import PlotData
+from daylio_parser.stats import Stats
+
+
+def test_collect(test_csv):
+    """Test stages of parsing and analysis inside collect()."""
+    records = []
+
+    with metrics.collect(sink=records.append) as collected:
+        table = Parser().load_table(test_csv)
+        stats = Stats(table)
+        stats.activity_moods()
+        stats.resample("week")
+        PlotData(table, stats=stats).interpolate()
+
+    stages = collected.as_dict()
+
+    assert stages["parser.load_table"]["rows"] == len(table)
+    assert stages["parser.load_table"]["nbytes"] == test_csv.stat().st_size
+    assert stages["parser.read"]["rows"] == len(table)
+    assert stages["parser.timestamps"]["calls"] == 1
+    assert stages["stats.activity_moods"]["rows"] == len(table)
+    assert stages["stats.resample"]["calls"] == 1
+    assert stages["stats.daily"]["calls"] == 1
+    assert stages["plot.interpolate"]["rows"] == 5
+    assert all(stage["seconds"] >= 0 for stage in stages.values())
+    assert sorted({record.name for record in records}) == sorted(stages)
+
+    # Cached results are not recomputed
+    with metrics.collect() as collected:
+        stats.activity_moods()
+
+    assert list(collected.as_dict()) == ["stats.activity_moods"]
+
+
+def test_collect_async(test_csv):
+    """Test that stages of jobs run by AsyncParser and AsyncStats are collected."""
+
+    async def load():
+        with metrics.collect() as collected:
+            table = await AsyncParser().load_table(test_csv)
+            await AsyncStats(Stats(table)).activity_moods()
+
+        return table, collected
+
+    table, collected = asyncio.run(load())
+    stages = collected.as_dict()
+
+    assert stages["parser.read"]["rows"] == len(table)
+    assert stages["parser.timestamps"]["calls"] == 1
+    assert stages["stats.activity_moods"]["rows"] == len(table)
+
+
+def test_disabled(test_csv):
+    """Test that nothing is recorded outside collect()."""
+    with metrics.collect() as collected:
+        pass
+
+    Parser().load_csv(test_csv)
+
+    assert collected.as_dict() == {}
+
+    with metrics.stage("test") as record:
+        record.rows = 10
+
+    assert record.rows == 0
+
+
+def test_allocations():
+    """Test peak allocations of nested stages."""
+    with metrics.collect(allocations=True) as collected:
+        with metrics.stage("outer"):
+            with metrics.stage("inner"):
+                data = bytearray(2**20)
+
+            del data
+            small = bytearray(2**10)
+
+        with metrics.stage("outer"):
+            pass
+
+    stages = collected.as_dict()
+
+    assert len(small) == 2**10
+    assert 2**20 <= stages["inner"]["allocated"] < 2**20 + 2**16
+    assert stages["outer"]["allocated"] >= stages["inner"]["allocated"]
+    assert stages["outer"]["calls"] == 2
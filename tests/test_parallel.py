@@ -0,0 +1,75 @@
+"""Test parallel.py."""
+
+import csv
+import datetime
+import random
+
+import numpy as np
+import pytest
+
+from daylio_parser import parallel
+from daylio_parser.parallel import row_boundaries
+from daylio_parser.parser import Parser
+
+
+@pytest.fixture()
+def large_csv(tmp_path):
+    """Export with multi-line notes, quotes and commas in notes."""
+    path = tmp_path / "large.csv"
+    rng = random.Random(0)  # noqa: S311
+    moods = ["awful", "bad", "meh", "good", "rad"]
+    activities = ["work", "nap", "gaming", "friends", "walk", "reading"]
+    notes = ["", "", "Fine", 'Said "hi",\nthen left', "Line one\nline two\n\nline four", "a, b"]
+    dt = datetime.datetime(2023, 1, 1, 23, 59)  # noqa: DTZ001
+
+    with path.open("w", newline="") as fwrite:
+        writer = csv.writer(fwrite)
+        writer.writerow(
+            ["full_date", "date", "weekday", "time", "mood", "activities", "note_title", "note"],
+        )
+
+        for _ in range(2000):
+            writer.writerow(
+                [
+                    dt.strftime("%Y-%m-%d"),
+                    dt.strftime("%d %B"),
+                    dt.strftime("%A"),
+                    dt.strftime("%I:%M %p").lstrip("0").lower(),
+                    rng.choice(moods),
+                    " | ".join(rng.sample(activities, rng.randrange(4))),
+                    "",
+                    rng.choice(notes),
+                ],
+            )
+            dt -= datetime.timedelta(minutes=rng.randrange(30, 600))
+
+    return path
+
+
+@pytest.mark.parametrize("block_size", [3, 7, 1 << 24])
+def test_row_boundaries(tmp_path, monkeypatch, block_size):
+    monkeypatch.setattr(parallel, "BLOCK_SIZE", block_size)
+    path = tmp_path / "rows.csv"
+    path.write_bytes(b'a,b\n1,"x\ny"\n2,"""q""\n"\n3,z\n')
+
+    assert row_boundaries(path, [0, 1, 5, 13, 14, 25]) == [0, 4, 12, 23, 23, 27]
+    assert row_boundaries(path, [100]) == [len(path.read_bytes())]
+
+
+@pytest.mark.parametrize("workers", [2, 3, 8])
+def test_parallel_load_table(large_csv, workers):
+    """Test that parallel parsing gives the same table as the serial one."""
+    serial = Parser().load_table(large_csv)
+    parallel = Parser().load_table(large_csv, workers=workers)
+
+    assert list(parallel.datetimes) == list(serial.datetimes)
+    assert parallel.activity_names == serial.activity_names
+    assert list(parallel.activity_ids) == list(serial.activity_ids)
+    assert list(parallel.levels) == list(serial.levels)
+    assert parallel.notes == serial.notes
+    assert parallel.to_entries() == serial.to_entries()
+
+
+def test_parallel_small_file(test_csv, entries):
+    assert Parser().load_table(test_csv, workers=64).to_entries() == entries
+    assert np.all(np.diff(Parser().load_table(test_csv, workers=2).datetimes) >= np.timedelta64(0))
@@ -1,8 +1,12 @@
 """Test parser.py"""
 
 import datetime
+import io
 
-from daylio_parser.parser import Entry, Parser
+import numpy as np
+import pytest
+
+from daylio_parser.parser import Entry, EntryTable, Parser
 
 
 def test_load_csv(test_csv):
@@ -38,3 +42,188 @@ def test_both_hour_formats(test_csv):
 
     assert entry_12h.datetime == datetime.datetime(2020, 5, 25, 7, 9)
     assert entry_24h.datetime == datetime.datetime(2020, 5, 25, 14, 58)
+
+
+def test_load_table(test_csv):
+    """Test that the columnar table holds the same data as the list of entries."""
+    parser = Parser()
+    entries = parser.load_csv(test_csv)
+    table = parser.load_table(test_csv)
+
+    assert len(table) == len(entries)
+    assert table.datetimes.dtype == np.dtype("datetime64[m]")
+    assert table.levels.dtype == np.int8
+    assert list(table.levels) == [entry.mood.level for entry in entries]
+
+    assert table[0] == entries[0]
+    assert table[-1] == entries[-1]
+    assert table.to_entries() == entries
+
+
+def test_table_from_entries(entries):
+    """Test converting entries into a table and back."""
+    table = EntryTable.from_entries(entries)
+
+    assert table.activities(len(table) - 1) == ["friends", "gaming", "programming", "nap"]
+    assert table.note(len(table) - 1) == "Awesome"
+    assert table.to_entries() == entries
+
+
+def test_iter_entries(test_csv):
+    """Test that entries are streamed in the file order or oldest first."""
+    parser = Parser()
+    entries = parser.load_csv(test_csv)
+
+    assert list(parser.iter_csv(test_csv)) == entries[::-1]
+    assert list(parser.iter_csv(test_csv, oldest_first=True)) == entries
+
+
+def test_iter_entries_oldest_first_file(test_csv):
+    """Test that files which are already oldest first are not reversed."""
+    with test_csv.open() as fread:
+        header, *rows = fread.readlines()
+
+    buffer = io.StringIO(header + "".join(reversed(rows)))
+
+    parser = Parser()
+    entries = parser.load_csv(test_csv)
+
+    assert list(parser.iter_entries(buffer, oldest_first=True)) == entries
+
+
+def test_table_concat(entries):
+    """Test that concatenated tables merge moods and activities."""
+    first = EntryTable.from_entries(entries[:20])
+    second = EntryTable.from_entries(entries[20:])
+    table = EntryTable.concat([first, second])
+
+    assert len(table.moods) == len({mood.name for mood in table.moods})
+    assert len(table.activity_names) == len(set(table.activity_names))
+    assert table.to_entries() == entries
+
+
+def test_entry_trusted(entries):
+    """Test that trusted entries are equal to and behave like validated ones."""
+    entry = entries[0]
+    fields = entry.model_dump()
+    trusted = Entry.trusted(entry.datetime, entry.mood, list(entry.activities), entry.notes)
+    validated = Entry(**fields)
+
+    assert trusted == validated
+    assert trusted.model_dump() == fields
+    assert trusted.model_fields_set == validated.model_fields_set
+
+    trusted.notes = "Changed"
+    assert trusted.model_copy().notes == "Changed"
+    assert Entry.trusted(entry.datetime, entry.mood, []).notes == ""
+
+    # Every entry has its own set of field names
+    entries[0].model_fields_set.discard("notes")
+
+    assert "notes" in entries[1].model_dump(exclude_unset=True)
+
+
+def test_table_between(test_csv, entries):
+    """Test that a date range of a table has the same entries as a filtered list."""
+    table = Parser().load_table(test_csv)
+    part = table.between(datetime.date(2020, 5, 27), datetime.date(2020, 5, 28))
+
+    expected = [
+        entry
+        for entry in entries
+        if datetime.date(2020, 5, 27) <= entry.datetime.date() <= datetime.date(2020, 5, 28)
+    ]
+
+    assert part.to_entries() == expected
+    assert np.shares_memory(part.datetimes, table.datetimes)
+    assert part.between(end=datetime.date(2020, 5, 27)).to_entries() == expected[:10]
+    assert table.between(start=datetime.date(2021, 1, 1)).to_entries() == []
+    assert table.is_sorted()
+    assert not EntryTable.from_entries(entries[::-1]).is_sorted()
+
+
+def test_parser_vocabulary(test_csv):
+    """Test that tables loaded by one parser share activity IDs."""
+    parser = Parser()
+    first = parser.load_table(test_csv)
+    second = parser.load_table(test_csv)
+
+    assert first.activity_names == second.activity_names == parser.activities.names
+    assert list(first.activity_ids) == list(second.activity_ids)
+
+    entries = parser.load_csv(test_csv)
+    work = [activity for entry in entries for activity in entry.activities if activity == "work"]
+
+    assert all(activity is work[0] for activity in work)
+
+
+def test_parser_vocabulary_cache(test_csv, tmp_path):
+    """Test that tables loaded from the cache use the parser's activity IDs."""
+    Parser().load_table(test_csv, cache=True, cache_dir=tmp_path)
+
+    parser = Parser()
+    other = io.StringIO(
+        "full_date,date,weekday,time,mood,activities,note_title,note\n"
+        "2020-06-01,1 June,Monday,8:00 am,rad,swimming | friends,,\n",
+    )
+    parser.load_table_from_buffer(other)
+    cached = parser.load_table(test_csv, cache=True, cache_dir=tmp_path)
+    parsed = Parser().load_table(test_csv)
+
+    assert parser.activities.names[:2] == ["swimming", "friends"]
+    assert cached.activity_names == parser.activities.names
+    assert cached.to_entries() == parsed.to_entries()
+
+    # Activities of the cached table are known to the parser
+    assert parser.load_table(test_csv).activity_ids.tolist() == cached.activity_ids.tolist()
+
+
+def test_activity_matrix(test_csv):
+    table = Parser().load_table(test_csv)
+    matrix = table.activity_matrix()
+    bitmasks = table.activity_bitmasks()
+
+    assert matrix.shape == (len(table), len(table.activity_names))
+
+    for i in range(len(table)):
+        names = [table.activity_names[j] for j in np.flatnonzero(matrix[i])]
+        bits = [j for j in range(len(table.activity_names)) if int(bitmasks[i]) >> j & 1]
+
+        assert sorted(names) == sorted(table.activities(i))
+        assert list(np.flatnonzero(matrix[i])) == bits
+
+
+def test_activity_bitmasks_limit():
+    names = [f"activity {i}" for i in range(65)]
+    table = EntryTable.from_columns(
+        np.array(["2020-05-25T10:00"], dtype="datetime64[m]"),
+        [Parser().config.get("rad")],
+        [tuple(range(65))],
+        [""],
+        names,
+    )
+
+    assert table.activity_matrix().sum() == 65
+
+    with pytest.raises(ValueError, match="at most 64"):
+        table.activity_bitmasks()
+
+
+def test_activity_bitmasks_shared_vocabulary():
+    """Test that the bitmask limit applies to IDs used in the table."""
+    parser = Parser()
+    header = "full_date,date,weekday,time,mood,activities,note_title,note\n"
+
+    for names in ([f"a{i}" for i in range(40)], [f"b{i}" for i in range(20)]):
+        row = f"2020-06-01,1 June,Monday,8:00 am,rad,{' | '.join(names)},,\n"
+        table = parser.load_table_from_buffer(io.StringIO(header + row))
+
+    assert len(table.activity_names) == 60
+    assert int(table.activity_bitmasks()[0]) == (2**20 - 1) << 40
+    assert table.activity_matrix().shape == (1, 60)
+
+    row = f"2020-06-02,2 June,Tuesday,8:00 am,rad,{' | '.join(f'c{i}' for i in range(5))},,\n"
+    table = parser.load_table_from_buffer(io.StringIO(header + row))
+
+    with pytest.raises(ValueError, match="at most 64"):
+        table.activity_bitmasks()
@@ -6,6 +6,7 @@ import numpy as np
 import pytest
 
 from daylio_parser.plot import PlotData
+from daylio_parser.stats import Stats
 
 
 def test_split_into_bands(entries):
@@ -19,24 +20,47 @@ def test_split_into_bands(entries):
     assert list(filtered_data["rad"][~filtered_data["rad"].mask].data) == [4.5, 5.0]
 
 
+def test_classify_bands(entries):
+    plotdata = PlotData(entries)
+    bands = plotdata.classify_bands(np.array([1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 5.5, np.nan]))
+
+    assert list(bands) == [0, 1, 1, 2, 2, 3, 3, 4, 4, -1, -1]
+
+
+def test_split_into_segments(entries):
+    """Test that segments select the same values as the masked bands."""
+    plotdata = PlotData(entries)
+    moods = np.array([1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 4.2, 3.9, 4.6])
+
+    segments = plotdata.split_into_segments(moods)
+    bands = plotdata.split_into_bands(moods)
+
+    assert segments["good"].tolist() == [[5, 7], [9, 11]]
+    assert segments["rad"].tolist() == [[7, 9], [11, 12]]
+
+    for name, band in bands.items():
+        values = [moods[start:stop] for start, stop in segments[name]]
+
+        assert list(np.concatenate(values)) == list(band[~band.mask].data)
+
+    assert all(len(ranges) == 0 for ranges in plotdata.split_into_segments([]).values())
+
+
 def test_interpolate(entries):
     plotdata = PlotData(entries)
 
     dates, moods = plotdata.interpolate()
 
-    first_date = dates[0].date()
-    first_day = []
-
-    for date, mood in zip(dates, moods, strict=False):
-        if date.date() == first_date:
-            first_day.append((date, mood))
+    assert dates.dtype == np.dtype("datetime64[m]")
+    assert moods.dtype == np.float64
 
-    first_entry = first_day[0]
-    last_entry = first_day[-1]
+    days = dates.astype("datetime64[D]")
+    first_day_dates = dates[days == days[0]]
+    first_day_moods = moods[days == days[0]]
 
     # First entry: midnight on the starting date, mood avg for the day is 2
-    assert first_entry[0] == datetime.datetime(2020, 5, 25, 0, 0, 0)
-    assert first_entry[1] == 2
+    assert first_day_dates[0] == np.datetime64("2020-05-25T00:00")
+    assert first_day_moods[0] == 2
 
     # Last entry: because we use 360 steps per day, one step == 4 minutes
     # therefore the last entry will be at 23:56
@@ -45,8 +69,70 @@ def test_interpolate(entries):
     #   Last step no.: 359
     #   Last mood level: (start level) + (step size) * (1 step before next midnight)
     #     = 359 * (4.3 - 2) / (360) = 2.2936
-    assert last_entry[0] == datetime.datetime(2020, 5, 25, 23, 56, 0)
-    assert pytest.approx(last_entry[1], 0.0001) == 4.2936
+    assert first_day_dates[-1] == np.datetime64("2020-05-25T23:56")
+    assert pytest.approx(first_day_moods[-1], 0.0001) == 4.2936
+
+    # The last point is the midnight after the last day
+    assert dates[-1] == np.datetime64("2020-05-31T00:00")
+    assert moods[-1] == 5
+
+
+def test_interpolate_does_not_modify_input(entries):
+    plotdata = PlotData(entries)
+    avg_moods = Stats(entries).average_moods()
+    expected = list(avg_moods)
+
+    dates, moods = plotdata.interpolate(avg_moods, 24, dtype=np.float32)
+
+    assert avg_moods == expected
+    assert moods.dtype == np.float32
+    assert len(dates) == len(moods) == 5 * 24 + 1
+
+
+def test_interpolate_nan():
+    """Test that days without a mood are skipped and the day before keeps its mood."""
+    plotdata = PlotData([])
+    avg_moods = [
+        (datetime.date(2020, 5, 25), np.nan),
+        (datetime.date(2020, 5, 26), 3.0),
+        (datetime.date(2020, 5, 27), np.nan),
+        (datetime.date(2020, 5, 28), 4.0),
+    ]
+
+    dates, moods = plotdata.interpolate(avg_moods, 2)
+
+    assert list(dates) == [
+        np.datetime64("2020-05-26T00:00"),
+        np.datetime64("2020-05-26T12:00"),
+        np.datetime64("2020-05-28T00:00"),
+        np.datetime64("2020-05-28T12:00"),
+        np.datetime64("2020-05-29T00:00"),
+    ]
+    assert list(moods) == [3.0, 3.0, 4.0, 4.0, 4.0]
+
+
+def test_interpolate_daily_series(entries):
+    """Test that the day before a day without entries keeps its mood."""
+    stats = Stats(entries)
+    dates, moods = PlotData(entries, stats=stats).interpolate(stats.daily(), 2)
+
+    # There are no entries on 2020-05-26
+    assert dates[0] == np.datetime64("2020-05-25T00:00")
+    assert dates[2] == np.datetime64("2020-05-27T00:00")
+    assert list(moods[:2]) == [2.0, 2.0]
+
+
+def test_between(entries):
+    """Test plot data scoped to a date range."""
+    plotdata = PlotData(entries).between(datetime.date(2020, 5, 29), datetime.date(2020, 5, 29))
+    dates, moods = plotdata.interpolate(interpolate_steps=2)
+
+    assert list(dates) == [
+        np.datetime64("2020-05-29T00:00"),
+        np.datetime64("2020-05-29T12:00"),
+        np.datetime64("2020-05-30T00:00"),
+    ]
+    assert list(moods) == [5.0, 5.0, 5.0]
 
 
 def test_max_interpolate_steps(entries):
@@ -54,3 +140,14 @@ def test_max_interpolate_steps(entries):
 
     with pytest.raises(ValueError):
         plotdata.interpolate(None, 9999)
+
+
+def test_shared_cache(entries):
+    """Test that PlotData reuses the series cached in a shared Stats."""
+    stats = Stats(entries)
+    stats.average_moods()
+    misses = stats.cache_misses
+
+    PlotData(entries, stats=stats).interpolate()
+
+    assert stats.cache_misses == misses
@@ -0,0 +1,96 @@
+"""Test rolling.py."""
+
+import numpy as np
+import pytest
+
+from daylio_parser.rolling import fill_gaps, rolling
+
+NAN = np.nan
+
+# A missing day on index 2
+VALUES = np.array([1.0, 3.0, NAN, 5.0, 2.0, 4.0])
+
+
+def test_fill_gaps():
+    """Test that missing values take the last preceding value."""
+    values = np.array([NAN, 2.0, NAN, NAN, 3.0])
+
+    assert np.array_equal(fill_gaps(values), [NAN, 2, 2, 2, 3], equal_nan=True)
+
+
+@pytest.mark.parametrize(
+    ("gaps", "expected"),
+    [
+        ("nan", [NAN, NAN, NAN, NAN, NAN, 11 / 3]),
+        ("fill", [NAN, NAN, 7 / 3, 11 / 3, 10 / 3, 11 / 3]),
+        ("time", [NAN, NAN, 2, 4, 3.5, 11 / 3]),
+    ],
+)
+def test_rolling_mean_gaps(gaps, expected):
+    """Test handling of missing days in windows of 3 days."""
+    assert np.allclose(rolling(VALUES, 3, "mean", gaps), expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("stat", ["mean", "std", "min", "max", "median"])
+def test_rolling_stats(stat):
+    """Test rolling statistics against plain NumPy on each window."""
+    rng = np.random.default_rng(0)
+    values = rng.uniform(1, 5, 100)
+    values[rng.random(100) < 0.2] = NAN
+
+    result = rolling(values, 7, stat, "time")
+    function = getattr(np, f"nan{stat}")
+
+    for i in range(6, 100):
+        window = values[i - 6 : i + 1]
+
+        if np.isnan(window).all():
+            assert np.isnan(result[i])
+        else:
+            assert pytest.approx(result[i]) == function(window)
+
+
+@pytest.mark.parametrize("gaps", ["nan", "fill", "time"])
+def test_rolling_median_repeated(gaps):
+    """Test the running median with repeated values, as with integer mood levels."""
+    rng = np.random.default_rng(1)
+    values = rng.integers(1, 6, 200).astype(np.float64)
+    values[rng.random(200) < 0.1] = NAN
+
+    result = rolling(values, 10, "median", gaps)
+    windows = np.lib.stride_tricks.sliding_window_view(rolling(values, 1, "mean", gaps), 10)
+    valid = ~np.isnan(windows).all(axis=1) if gaps == "time" else ~np.isnan(windows).any(axis=1)
+    expected = np.full(len(windows), NAN)
+    expected[valid] = [np.nanmedian(window) for window in windows[valid]]
+
+    assert np.allclose(result[9:], expected, equal_nan=True)
+
+
+def test_ewma():
+    """Test the exponentially weighted mean with a span of 3 days."""
+    # Weights decay by a half each day, also over the missing day
+    expected = (1 / 8 + 3 / 4 + 5) / (1 / 8 + 1 / 4 + 1)
+
+    assert pytest.approx(rolling(VALUES, 3, "ewma", "time")[3]) == expected
+
+    # The mean starts over after the missing day
+    restarted = rolling(VALUES, 3, "ewma", "nan")
+
+    assert np.isnan(restarted[2])
+    assert restarted[3] == 5.0
+    assert pytest.approx(restarted[4]) == (5 / 2 + 2) / (1 / 2 + 1)
+
+    long_values = np.full(10000, 3.0)
+    assert np.allclose(rolling(long_values, 30, "ewma"), 3.0)
+
+
+def test_rolling_errors():
+    """Test invalid parameters."""
+    with pytest.raises(ValueError, match="at least 1"):
+        rolling(VALUES, 0)
+
+    with pytest.raises(ValueError, match="Unknown statistic"):
+        rolling(VALUES, 3, "mode")
+
+    with pytest.raises(ValueError, match="Unknown gap handling"):
+        rolling(VALUES, 3, gaps="skip")
@@ -0,0 +1,53 @@
+"""Test timestamps.py."""
+
+import datetime
+
+import numpy as np
+import pytest
+
+from daylio_parser.timestamps import TimestampDecoder, parse_time
+
+
+def test_parse_time():
+    """Test both 12 and 24 hour formats."""
+    assert parse_time("6:50 pm") == (18, 50)
+    assert parse_time("6:50 PM") == (18, 50)
+    assert parse_time("6:50\u202fpm") == (18, 50)
+    assert parse_time("6:50\xa0pm") == (18, 50)
+    assert parse_time("12:46 am") == (0, 46)
+    assert parse_time("12:20 pm") == (12, 20)
+    assert parse_time("14:58") == (14, 58)
+    assert parse_time("0:05") == (0, 5)
+
+
+@pytest.mark.parametrize("time", ["", "noon", "13:00 pm", "0:30 am", "24:00", "10:60", "6:50 xm"])
+def test_parse_time_invalid(time):
+    with pytest.raises(ValueError, match="known format|out of range"):
+        parse_time(time)
+
+
+def test_decode_matches_strptime():
+    """Test that the decoder gives the same results as strptime."""
+    decoder = TimestampDecoder()
+
+    for date, time, fmt in [
+        ("2020-05-25", "7:09 am", "%Y-%m-%d %I:%M %p"),
+        ("2020-05-25", "14:58", "%Y-%m-%d %H:%M"),
+        ("2020-02-29", "11:59 pm", "%Y-%m-%d %I:%M %p"),
+    ]:
+        expected = datetime.datetime.strptime(f"{date} {time}", fmt)  # noqa: DTZ007
+
+        assert decoder.decode(date, time) == expected
+        # Cached value
+        assert decoder.decode(date, time) == expected
+
+
+def test_decode_many():
+    decoder = TimestampDecoder()
+    datetimes = decoder.decode_many(["2020-05-25", "2020-05-30"], ["7:09 am", "18:50"])
+
+    assert datetimes.dtype == np.dtype("datetime64[m]")
+    assert list(datetimes) == [
+        np.datetime64("2020-05-25T07:09"),
+        np.datetime64("2020-05-30T18:50"),
+    ]